@@ -0,0 +1,97 @@
+"""
+API keys for machine clients
+
+Batch integrations authenticate with an X-API-Key header instead of the
+password + JWT flow, so they never trigger bcrypt. A key looks like
+bk_<prefix>_<secret>: the prefix is stored in clear and indexed, the whole
+key only as an HMAC-SHA256 digest under API_KEY_SECRET. Verification is one
+indexed lookup (skipped while the key is cached) plus one HMAC, i.e.
+microseconds of CPU.
+"""
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from dotenv import load_dotenv
+import hashlib
+import hmac
+import os
+import secrets
+
+from app.cache import TTLCache
+from app.models import AccountHolder, ApiKey
+
+# Load environment variables
+load_dotenv()
+
+# Key for the HMAC over API keys (defaults to the JWT secret)
+API_KEY_SECRET = os.getenv("API_KEY_SECRET") or os.getenv("SECRET_KEY", "dev-secret-key")
+
+# Recently verified keys (prefix -> digest and holder email); bounds how long a
+# key revoked in another process keeps working
+API_KEY_CACHE_SIZE = int(os.getenv("API_KEY_CACHE_SIZE", "1024"))
+API_KEY_CACHE_TTL_SECONDS = float(os.getenv("API_KEY_CACHE_TTL_SECONDS", "60"))
+
+API_KEY_MARKER = "bk"
+
+api_key_cache = TTLCache(API_KEY_CACHE_SIZE, API_KEY_CACHE_TTL_SECONDS)
+
+def hash_api_key(key: str) -> str:
+    """Hex HMAC-SHA256 digest stored for a key"""
+    return hmac.new(API_KEY_SECRET.encode(), key.encode(), hashlib.sha256).hexdigest()
+
+def generate_api_key() -> Tuple[str, str]:
+    """A new random key and its prefix"""
+    prefix = secrets.token_hex(6)
+    return f"{API_KEY_MARKER}_{prefix}_{secrets.token_urlsafe(32)}", prefix
+
+def key_prefix(key: str) -> Optional[str]:
+    """The lookup prefix of a well-formed key, else None"""
+    parts = key.split("_", 2)
+    if len(parts) != 3 or parts[0] != API_KEY_MARKER or not parts[1] or not parts[2]:
+        return None
+    return parts[1]
+
+async def verify_api_key(db: AsyncSession, key: str) -> Optional[str]:
+    """Email of the holder owning an active key, or None"""
+    prefix = key_prefix(key)
+    if prefix is None:
+        return None
+    entry = api_key_cache.get(prefix)
+    if entry is None:
+        result = await db.execute(
+            select(ApiKey.key_hash, AccountHolder.email)
+            .join(AccountHolder, AccountHolder.id == ApiKey.holder_id)
+            .where(ApiKey.prefix == prefix, ApiKey.revoked_at.is_(None))
+        )
+        entry = result.first()
+        if entry is None:
+            return None
+        entry = tuple(entry)
+        api_key_cache.set(prefix, entry)
+    key_hash, email = entry
+    if not hmac.compare_digest(hash_api_key(key), key_hash):
+        return None
+    return email
+
+def issue_api_key(db: AsyncSession, holder_id: int, name: str) -> Tuple[ApiKey, str]:
+    """Add a new key to the session (the caller commits); the plain key is only returned here"""
+    key, prefix = generate_api_key()
+    api_key = ApiKey(holder_id=holder_id, name=name, prefix=prefix, key_hash=hash_api_key(key))
+    db.add(api_key)
+    return api_key, key
+
+def revoke_api_key(api_key: ApiKey):
+    """Mark a key revoked (the caller commits) and forget it in this process"""
+    api_key.revoked_at = datetime.utcnow()
+    api_key_cache.pop(api_key.prefix)
+    session = object_session(api_key)
+    if session is not None:
+        session.info.setdefault("revoked_api_keys", set()).add(api_key.prefix)
+
+@event.listens_for(Session, "after_commit")
+def _forget_committed_revocations(session):
+    """Drop revoked keys again on commit, in case a request re-cached the still-active row meanwhile"""
+    for prefix in session.info.pop("revoked_api_keys", ()):
+        api_key_cache.pop(prefix)
@@ -0,0 +1,195 @@
+"""
+Hot/cold transaction archiving
+
+Transactions older than ARCHIVE_AFTER_DAYS are moved from the transactions
+table into transactions_archive so that the per-account indexes the API reads
+stay small. Readers use account_transactions(), which only touches the
+archive when the account has archived rows and the requested range reaches
+back far enough to need them.
+
+Run the archiver periodically (e.g. nightly):
+
+    python -m app.archive [--older-than-days N] [--batch-size N] [--dry-run]
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+import argparse
+import os
+
+from app.models import ArchivedTransaction, Transaction, TransactionType
+
+# Load environment variables
+load_dotenv()
+
+# Transactions older than this many days are moved to the archive
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+
+# Rows moved per archiver transaction (keeps write locks short)
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+ARCHIVED_COLUMNS = ["id", "account_id", "type", "amount", "description", "created_at"]
+
+def archive_cutoff(older_than_days: int = ARCHIVE_AFTER_DAYS) -> datetime:
+    """Transactions created before this moment are due for archiving"""
+    return datetime.utcnow() - timedelta(days=older_than_days)
+
+def _archivable(cutoff: datetime):
+    """
+    Hot transactions due for archiving. The row with the highest id is never
+    moved: transactions is a plain INTEGER PRIMARY KEY table, for which SQLite
+    hands out max(id) + 1, so emptying the top of the table would give new
+    transactions ids that already exist in the archive.
+    """
+    newest_id = select(func.max(Transaction.id)).scalar_subquery()
+    return (Transaction.created_at < cutoff) & (Transaction.id < newest_id)
+
+def archive_transactions(engine: Engine, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Move transactions created before cutoff into the archive, one batch per
+    transaction so readers and writers are never blocked for long. Each row is
+    copied and deleted atomically, so a transaction is always in exactly one
+    store. The newest transaction always stays hot (see _archivable). Returns
+    the number of rows moved.
+    """
+    moved = 0
+    hot_columns = [getattr(Transaction, name) for name in ARCHIVED_COLUMNS]
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(
+                select(Transaction.id)
+                .where(_archivable(cutoff))
+                .order_by(Transaction.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return moved
+            conn.execute(
+                insert(ArchivedTransaction).from_select(
+                    ARCHIVED_COLUMNS, select(*hot_columns).where(Transaction.id.in_(ids))
+                )
+            )
+            conn.execute(delete(Transaction).where(Transaction.id.in_(ids)))
+        moved += len(ids)
+
+def count_archivable(engine: Engine, cutoff: datetime) -> int:
+    """Number of hot transactions due for archiving"""
+    with engine.connect() as conn:
+        return conn.execute(select(func.count(Transaction.id)).where(_archivable(cutoff))).scalar()
+
+async def archived_through(db: AsyncSession, account_id: int) -> Optional[datetime]:
+    """
+    Creation time of the account's newest archived transaction (None if
+    nothing is archived). Remembered for the rest of the session.
+    """
+    known = db.info.setdefault("archived_through", {})
+    if account_id not in known:
+        known[account_id] = await db.scalar(
+            select(func.max(ArchivedTransaction.created_at)).where(ArchivedTransaction.account_id == account_id)
+        )
+    return known[account_id]
+
+def _before(model, created_at: datetime, transaction_id: int):
+    """
+    Rows ordered after (created_at, transaction_id) in newest-first order.
+    Written with 1 µs bounds instead of equality on created_at because SQLite
+    stores server-default timestamps without the fractional part, so the same
+    instant can compare unequal as text.
+    """
+    tick = timedelta(microseconds=1)
+    return (model.created_at < created_at + tick) & or_(
+        model.created_at <= created_at - tick, model.id < transaction_id
+    )
+
+def _history_query(
+    model,
+    account_id: int,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    limit: Optional[int],
+    before: Optional[Tuple[datetime, int]] = None,
+    transaction_type: Optional[TransactionType] = None,
+):
+    query = select(model).where(model.account_id == account_id)
+    if transaction_type is not None:
+        query = query.where(model.type == transaction_type)
+    if start is not None:
+        query = query.where(model.created_at >= start)
+    if end is not None:
+        query = query.where(model.created_at <= end)
+    if before is not None:
+        query = query.where(_before(model, *before))
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+async def account_transactions(
+    db: AsyncSession,
+    account_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    before: Optional[Tuple[datetime, int]] = None,
+    transaction_type: Optional[TransactionType] = None,
+) -> List:
+    """
+    An account's transactions in [start, end], newest first, spanning the hot
+    table and the archive. The archive is only queried when the account has
+    archived rows at or after start and the hot rows did not fill the limit.
+    before=(created_at, id) continues a listing after that row (keyset
+    pagination), and transaction_type restricts the listing to one type.
+    """
+    filters = dict(before=before, transaction_type=transaction_type)
+    result = await db.execute(_history_query(Transaction, account_id, start, end, limit, **filters))
+    transactions = list(result.scalars().all())
+    if limit is not None and len(transactions) >= limit:
+        return transactions
+
+    newest_archived = await archived_through(db, account_id)
+    if newest_archived is None or (start is not None and newest_archived < start):
+        return transactions
+
+    remaining = None if limit is None else limit - len(transactions)
+    result = await db.execute(_history_query(ArchivedTransaction, account_id, start, end, remaining, **filters))
+    transactions.extend(result.scalars().all())
+    transactions.sort(key=lambda t: (t.created_at, t.id), reverse=True)
+    return transactions
+
+async def transaction_type_counts(db: AsyncSession, account_id: int) -> Dict[TransactionType, int]:
+    """Number of the account's transactions of each type, across the hot table and the archive"""
+    counts = {transaction_type: 0 for transaction_type in TransactionType}
+    models = [Transaction]
+    if await archived_through(db, account_id) is not None:
+        models.append(ArchivedTransaction)
+    for model in models:
+        result = await db.execute(
+            select(model.type, func.count(model.id))
+            .where(model.account_id == account_id)
+            .group_by(model.type)
+        )
+        for transaction_type, count in result.all():
+            counts[transaction_type] += count
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old transactions into the archive table")
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="only report how many rows would move")
+    args = parser.parse_args()
+
+    from app.db import engine
+
+    cutoff = archive_cutoff(args.older_than_days)
+    if args.dry_run:
+        print(f"Would archive {count_archivable(engine, cutoff)} transactions created before {cutoff:%Y-%m-%d %H:%M:%S}")
+        return
+    moved = archive_transactions(engine, cutoff, args.batch_size)
+    print(f"Archived {moved} transactions created before {cutoff:%Y-%m-%d %H:%M:%S}")
+
+if __name__ == "__main__":
+    main()
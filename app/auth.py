@@ -2,16 +2,28 @@
 Authentication utilities and JWT token management
 """
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from fastapi import Security
+from fastapi.security import APIKeyHeader, HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from dotenv import load_dotenv
+import logging
 import os
+import secrets
+import time
 
-from app.db import get_db
+from app.api_keys import verify_api_key
+from app.cache import TTLCache
+from app.db import get_async_db
+from app.lookups import get_user_by_email
+from app.password_hashing import PasswordHashingBusy, password_hash_pool
+from app.token_revocation import holder_tokens_revoked, is_token_revoked, revoked_tokens, token_digest
+from app.user_cache import cache_user, get_cached_user, invalidate_user
 from app.models import AccountHolder
 from app.schemas import TokenData
 
@@ -23,12 +35,43 @@ SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Opt-in stateless mode: access tokens also carry holder_id, role and active,
+# so read-only routes can authorize without loading the holder. Such tokens
+# are short-lived because their claims can only be revoked in-process.
+STATELESS_AUTH = os.getenv("STATELESS_AUTH", "false").lower() == "true"
+STATELESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("STATELESS_TOKEN_EXPIRE_MINUTES", "5"))
+
+# Decoded payloads of recently verified tokens, keyed by token digest (0 disables)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+token_cache = TTLCache(TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+# Password hashing scheme for new hashes and its cost (bcrypt: log2 rounds;
+# pbkdf2_sha256: iterations). Unset cost means the passlib default. Hashes made
+# with another scheme or cost still verify and are upgraded on the next login.
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "0")) or None
+
+# Schemes older hashes may use; always accepted for verification
+LEGACY_PASSWORD_SCHEMES = ["bcrypt"]
+
+logger = logging.getLogger("app.auth")
+
+def make_pwd_context(scheme: str = PASSWORD_HASH_SCHEME, rounds: Optional[int] = None) -> CryptContext:
+    """Password context hashing with scheme at the given cost; other known schemes are deprecated"""
+    schemes = [scheme] + [legacy for legacy in LEGACY_PASSWORD_SCHEMES if legacy != scheme]
+    settings = {f"{scheme}__rounds": rounds} if rounds else {}
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
+
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = make_pwd_context(PASSWORD_HASH_SCHEME, PASSWORD_HASH_ROUNDS)
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
+# Routes that also accept API keys (X-API-Key) need neither credential to be required
+optional_bearer = HTTPBearer(auto_error=False)
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -37,6 +80,40 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password; when it matches a hash with outdated scheme or cost
+    (passlib's needs_update), also return a fresh hash to store
+    """
+    if not pwd_context.verify(plain_password, hashed_password):
+        return False, None
+    if pwd_context.needs_update(hashed_password):
+        return True, pwd_context.hash(plain_password)
+    return True, None
+
+async def run_password_job(fn, *args):
+    """Run a bcrypt call on the hashing pool, answering 503 when it is saturated"""
+    try:
+        return await password_hash_pool.run(fn, *args)
+    except PasswordHashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash without blocking the event loop"""
+    return await run_password_job(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update_password without blocking the event loop"""
+    return await run_password_job(verify_and_update_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await run_password_job(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -48,56 +125,166 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_user_access_token(user: AccountHolder) -> Tuple[str, int]:
+    """Issue an access token for a holder; returns the token and its lifetime in seconds"""
+    if STATELESS_AUTH:
+        minutes = STATELESS_TOKEN_EXPIRE_MINUTES
+        claims = {
+            "sub": user.email,
+            "holder_id": user.id,
+            "role": user.role,
+            "active": user.active,
+            "iat": time.time(),
+        }
+    else:
+        minutes = ACCESS_TOKEN_EXPIRE_MINUTES
+        claims = {"sub": user.email}
+    # Unique per token, so revoking one session never revokes another
+    claims["jti"] = secrets.token_urlsafe(12)
+    return create_access_token(claims, expires_delta=timedelta(minutes=minutes)), minutes * 60
+
 def verify_token(token: str) -> Optional[dict]:
-    """Verify and decode a JWT token"""
+    """
+    Verify and decode a JWT token. Revoked tokens are rejected. Verified
+    payloads are cached until the token's exp, so clients reusing a token
+    skip signature verification.
+    """
+    digest = token_digest(token)
+    if is_token_revoked(digest):
+        return None
+    payload = token_cache.get(digest)
+    if payload is not None:
+        if payload["exp"] > time.time():
+            return dict(payload)
+        token_cache.pop(digest)
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         return None
+    if isinstance(payload.get("exp"), (int, float)):
+        token_cache.set(digest, payload, ttl=payload["exp"] - time.time())
+    return dict(payload)
 
-def get_user_by_email(db: Session, email: str) -> Optional[AccountHolder]:
-    """Get user by email"""
-    return db.query(AccountHolder).filter(AccountHolder.email == email).first()
-
-def authenticate_user(db: Session, email: str, password: str) -> Optional[AccountHolder]:
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[AccountHolder]:
     """Authenticate user with email and password"""
-    user = get_user_by_email(db, email)
+    user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    # Release the connection (the user stays usable, detached) so no pooled
+    # connection is held while the check waits for and runs on the hashing pool
+    await db.close()
+    valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash is not None:
+        # Transparent upgrade to the configured scheme/cost; a failed write
+        # only means the upgrade is retried on the next login
+        try:
+            await db.execute(
+                update(AccountHolder).where(AccountHolder.id == user.id).values(hashed_password=new_hash)
+            )
+            await db.commit()
+        except SQLAlchemyError as e:
+            logger.warning("Could not store rehashed password for holder %s: %s", user.id, e)
+            await db.rollback()
+        else:
+            user.hashed_password = new_hash
+            invalidate_user(user.email)
     return user
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> AccountHolder:
-    """Get current authenticated user from JWT token"""
-    credentials_exception = HTTPException(
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
-    try:
-        payload = verify_token(credentials.credentials)
-        if payload is None:
-            raise credentials_exception
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
-        raise credentials_exception
-    
-    user = get_user_by_email(db, email=token_data.email)
+
+async def load_user(db: AsyncSession, email: str) -> AccountHolder:
+    """Load a holder by email, served from the holder cache when possible"""
+    user = await get_cached_user(db, email)
     if user is None:
-        raise credentials_exception
+        user = await get_user_by_email(db, email=email)
+        if user is None:
+            raise credentials_exception()
+        cache_user(email, user)
+    return user
+
+async def load_user_from_payload(db: AsyncSession, payload: dict) -> AccountHolder:
+    """Load the holder named by a decoded token's subject"""
+    email: str = payload.get("sub")
+    if email is None:
+        raise credentials_exception()
+    token_data = TokenData(email=email)
+    return await load_user(db, token_data.email)
+
+def not_authenticated() -> HTTPException:
+    # Same answer HTTPBearer gives when the Authorization header is missing
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authenticated")
+
+async def load_api_key_user(db: AsyncSession, api_key: str) -> AccountHolder:
+    """Load the holder owning an API key"""
+    email = await verify_api_key(db, api_key)
+    if email is None:
+        raise credentials_exception()
+    return await load_user(db, email)
+
+def ensure_active(user: AccountHolder) -> AccountHolder:
+    if not user.active:
+        raise HTTPException(status_code=400, detail="Inactive user")
     return user
 
-def get_current_active_user(current_user: AccountHolder = Depends(get_current_user)) -> AccountHolder:
-    """Get current active user"""
-    if not current_user.active:
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> AccountHolder:
+    """Get current authenticated user from JWT token"""
+    await revoked_tokens.sync(db)
+    payload = verify_token(credentials.credentials)
+    if payload is None:
+        raise credentials_exception()
+    return await load_user_from_payload(db, payload)
+
+async def get_current_active_user(
+    api_key: Optional[str] = Security(api_key_header),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer),
+    db: AsyncSession = Depends(get_async_db)
+) -> AccountHolder:
+    """Get current active user from an API key or, failing that, a JWT"""
+    if api_key:
+        return ensure_active(await load_api_key_user(db, api_key))
+    if credentials is None:
+        raise not_authenticated()
+    return ensure_active(await get_current_user(credentials, db))
+
+async def get_current_principal(
+    api_key: Optional[str] = Security(api_key_header),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer),
+    db: AsyncSession = Depends(get_async_db)
+) -> AccountHolder:
+    """
+    Get the current active user for read-only routes. Stateless tokens are
+    trusted without a database lookup and yield a transient AccountHolder
+    with only id, email, role and active set; other tokens and API keys load
+    the holder.
+    """
+    if api_key:
+        return ensure_active(await load_api_key_user(db, api_key))
+    if credentials is None:
+        raise not_authenticated()
+    await revoked_tokens.sync(db)
+    payload = verify_token(credentials.credentials)
+    if payload is None:
+        raise credentials_exception()
+    if "holder_id" not in payload:
+        return ensure_active(await load_user_from_payload(db, payload))
+    
+    if payload.get("sub") is None or holder_tokens_revoked(payload["holder_id"], payload.get("iat", 0)):
+        raise credentials_exception()
+    if not payload.get("active"):
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
+    return AccountHolder(
+        id=payload["holder_id"],
+        email=payload["sub"],
+        role=payload.get("role"),
+        active=True,
+    )
@@ -0,0 +1,63 @@
+"""
+Atomic balance changes
+
+A balance is never read, modified in Python and written back: each change is
+one conditional UPDATE,
+
+    UPDATE accounts SET balance = balance + :delta, version = version + 1
+    WHERE id = :id AND holder_id = :holder [AND balance >= :amount]
+
+so concurrent withdrawals cannot both pass the funds check and no update is
+lost, without serializing the handlers. The row lock taken by the UPDATE is
+held until the caller commits the transaction rows inserted alongside it.
+
+Batches lock the row first (lock_balance), decide each item against the
+balance that lock holds steady, then apply the net change with one
+change_balance call.
+"""
+from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+import os
+
+from app.models import Account
+
+# Load environment variables
+load_dotenv()
+
+# Largest number of items accepted by POST /transactions/{account_id}/batch
+TRANSACTION_BATCH_MAX_ITEMS = int(os.getenv("TRANSACTION_BATCH_MAX_ITEMS", "1000"))
+
+async def change_balance(db: AsyncSession, account_id: int, holder_id: int, delta: float) -> bool:
+    """
+    Add delta to the balance of an account owned by holder_id; a negative
+    delta only applies if the balance covers it. Returns False (nothing
+    changed) when the account is missing, foreign or short of funds.
+    """
+    statement = update(Account).where(Account.id == account_id, Account.holder_id == holder_id)
+    if delta < 0:
+        statement = statement.where(Account.balance >= -delta)
+    statement = (
+        statement
+        .values(balance=Account.balance + delta, version=Account.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(statement)
+    return result.rowcount == 1
+
+async def lock_balance(db: AsyncSession, account_id: int, holder_id: int) -> Optional[float]:
+    """
+    Take the account's row lock (an UPDATE bumping its version) and return
+    the balance it now holds steady for the rest of the transaction; None if
+    the account is missing or foreign. For writers that must decide several
+    dependent changes (e.g. batches) before applying them with change_balance.
+    """
+    result = await db.execute(
+        update(Account)
+        .where(Account.id == account_id, Account.holder_id == holder_id)
+        .values(version=Account.version + 1)
+        .returning(Account.balance)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none()
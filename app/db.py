@@ -1,10 +1,28 @@
 """
 Database configuration and session management
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from collections import OrderedDict
+from contextvars import ContextVar
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from typing import List, Optional
 from dotenv import load_dotenv
+import functools
+import hashlib
+import hmac
+import inspect
+import math
 import os
+import threading
+import time
+
+from app.pool import pool_options, register_engine
+from app.slow_query_log import install_slow_query_log
+from app.sqlite_profile import apply_sqlite_profile
 
 # Load environment variables
 load_dotenv()
@@ -12,15 +30,100 @@ load_dotenv()
 # Get database URL from environment
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./banking.db")
 
+# Async drivers used when the URL does not name one explicitly
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+def to_async_url(url: str) -> str:
+    """Rewrite a sync database URL to use the matching async driver"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend in ASYNC_DRIVERS:
+        parsed = parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return parsed.render_as_string(hide_password=False)
+
+# Async database URL (defaults to the sync URL with an async driver)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+# Optional read replica; read-only routes use the primary when unset
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+ASYNC_READ_DATABASE_URL = os.getenv(
+    "ASYNC_READ_DATABASE_URL",
+    to_async_url(READ_DATABASE_URL) if READ_DATABASE_URL else None
+)
+
+# How long a client keeps reading from the primary after one of its writes
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Cookie carrying the end of a client's read-your-writes window, so that any
+# worker process (not just the one that handled the write) honours it
+READ_YOUR_WRITES_COOKIE = "primary_until"
+
+# Key signing that cookie (the JWT secret unless set separately)
+READ_YOUR_WRITES_SECRET = os.getenv("READ_YOUR_WRITES_SECRET", os.getenv("SECRET_KEY", "dev-secret-key"))
+
 # Create SQLAlchemy engine
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
+    **pool_options(DATABASE_URL)
+)
+
+# Create async engine used by the API routers
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **pool_options(ASYNC_DATABASE_URL, is_async=True)
 )
 
+# Create async engine for read-only routes
+if ASYNC_READ_DATABASE_URL:
+    async_read_engine = create_async_engine(
+        ASYNC_READ_DATABASE_URL,
+        **pool_options(ASYNC_READ_DATABASE_URL, is_async=True)
+    )
+else:
+    async_read_engine = async_engine
+
+# Apply the SQLITE_PROFILE pragmas to every new SQLite connection
+apply_sqlite_profile(engine)
+apply_sqlite_profile(async_engine.sync_engine)
+if async_read_engine is not async_engine:
+    apply_sqlite_profile(async_read_engine.sync_engine)
+
+# Log statements slower than SLOW_QUERY_MS together with their query plan
+install_slow_query_log(engine)
+install_slow_query_log(async_engine.sync_engine)
+if async_read_engine is not async_engine:
+    install_slow_query_log(async_read_engine.sync_engine)
+
+# Report the pools on the internal metrics endpoint
+register_engine("primary", engine)
+register_engine("primary_async", async_engine.sync_engine)
+if async_read_engine is not async_engine:
+    register_engine("replica_async", async_read_engine.sync_engine)
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create AsyncSessionLocal class. Objects stay loaded after commit so that
+# handlers can return them without triggering implicit IO.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Create AsyncReadSessionLocal class for read-only routes
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -33,3 +136,146 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def client_key(request: Request) -> str:
+    """Identify the caller for read-your-writes tracking (credential digest, else client address)"""
+    credential = request.headers.get("authorization") or request.headers.get("x-api-key")
+    if credential:
+        return hashlib.sha256(credential.encode()).hexdigest()
+    return request.client.host if request.client else ""
+
+def _primary_until_signature(until: str) -> str:
+    return hmac.new(READ_YOUR_WRITES_SECRET.encode(), until.encode(), hashlib.sha256).hexdigest()
+
+def sign_primary_until(until: float) -> str:
+    """Cookie value stating that reads go to the primary until this Unix time"""
+    value = str(math.ceil(until))
+    return f"{value}.{_primary_until_signature(value)}"
+
+def primary_until_from(request: Request) -> float:
+    """End of the window carried by the request's cookie (0 if absent, expired or forged)"""
+    value, _, signature = request.cookies.get(READ_YOUR_WRITES_COOKIE, "").partition(".")
+    if not value.isdigit() or not hmac.compare_digest(signature, _primary_until_signature(value)):
+        return 0.0
+    return float(value)
+
+# Clients that committed recently, oldest first, mapped to when their
+# read-your-writes window ends
+_primary_until = OrderedDict()
+_primary_until_lock = threading.Lock()
+
+def mark_recent_write(key: str):
+    """Pin a client's reads to the primary for READ_YOUR_WRITES_SECONDS"""
+    now = time.monotonic()
+    with _primary_until_lock:
+        _primary_until.pop(key, None)
+        _primary_until[key] = now + READ_YOUR_WRITES_SECONDS
+        # Every window has the same length, so expired entries sit at the front
+        while _primary_until:
+            oldest_key, until = next(iter(_primary_until.items()))
+            if until > now:
+                break
+            del _primary_until[oldest_key]
+
+def wrote_recently(key: str) -> bool:
+    """Whether a client is still inside its read-your-writes window"""
+    with _primary_until_lock:
+        until = _primary_until.get(key)
+    return until is not None and until > time.monotonic()
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session):
+    """Start the read-your-writes window for the client whose session committed"""
+    key = session.info.get("client_key")
+    if key is not None:
+        mark_recent_write(key)
+    response = session.info.get("response")
+    if response is not None and READ_YOUR_WRITES_SECONDS > 0:
+        # The in-process window only helps while the client's next request
+        # lands on this worker; the cookie carries it to the others
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            sign_primary_until(time.time() + READ_YOUR_WRITES_SECONDS),
+            max_age=math.ceil(READ_YOUR_WRITES_SECONDS),
+            httponly=True,
+            samesite="lax",
+        )
+
+# Sessions opened for the request being handled (set by ReleaseSessionsRoute)
+_request_sessions: ContextVar[Optional[List[AsyncSession]]] = ContextVar("request_sessions", default=None)
+
+def track_request_session(db: AsyncSession):
+    """Register a session to be closed as soon as the endpoint returns"""
+    sessions = _request_sessions.get()
+    if sessions is not None:
+        sessions.append(db)
+
+async def release_request_sessions():
+    """Close the current request's sessions, returning their connections to the pool"""
+    sessions = _request_sessions.get()
+    while sessions:
+        await sessions.pop().close()
+
+def release_sessions_after(endpoint):
+    """Wrap an async endpoint so its sessions are released when it returns"""
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def endpoint_releasing_sessions(*args, **kwargs):
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            await release_request_sessions()
+
+    return endpoint_releasing_sessions
+
+class ReleaseSessionsRoute(APIRoute):
+    """
+    Route that gives database connections back to the pool as soon as the
+    endpoint returns, instead of holding them while the response is
+    validated, serialized and sent (FastAPI only tears down dependencies
+    after the response). Sessions already check out a connection lazily on
+    their first statement.
+
+    Endpoints must not rely on lazy loading once they return; results are
+    already fully loaded because async sessions cannot lazy load either.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, release_sessions_after(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def handler_tracking_sessions(request: Request):
+            token = _request_sessions.set([])
+            try:
+                return await handler(request)
+            finally:
+                await release_request_sessions()
+                _request_sessions.reset(token)
+
+        return handler_tracking_sessions
+
+async def get_async_db(request: Request, response: Response):
+    """
+    Dependency to get an async database session
+    """
+    async with AsyncSessionLocal() as db:
+        db.info["client_key"] = client_key(request)
+        db.info["response"] = response
+        track_request_session(db)
+        yield db
+
+async def get_read_db(request: Request):
+    """
+    Dependency to get an async database session for read-only routes.
+    Uses the read replica unless the caller wrote within READ_YOUR_WRITES_SECONDS
+    (remembered by this process, or by any process via the signed cookie).
+    """
+    recent = wrote_recently(client_key(request)) or primary_until_from(request) > time.time()
+    session_factory = AsyncSessionLocal if recent else AsyncReadSessionLocal
+    async with session_factory() as db:
+        track_request_session(db)
+        yield db
@@ -0,0 +1,136 @@
+"""
+Login throttling with per-email and per-IP token buckets
+
+Every login attempt costs a bcrypt verification, so a credential-stuffing
+burst would otherwise turn directly into CPU load. Each attempt takes a token
+from the bucket of the client IP and from the bucket of the submitted email;
+an empty bucket rejects the attempt with 429 before any database query or
+password hashing happens. Buckets refill continuously, so the limit behaves
+like a sliding window: BURST attempts at once, then PER_MINUTE on average.
+
+State is in-process and bounded to LOGIN_THROTTLE_MAX_KEYS buckets per kind
+(least recently used buckets are dropped first).
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+from fastapi import HTTPException, status
+from dotenv import load_dotenv
+import math
+import os
+import threading
+import time
+
+# Load environment variables
+load_dotenv()
+
+# Attempts allowed at once and refill rate, per submitted email
+LOGIN_RATE_EMAIL_BURST = int(os.getenv("LOGIN_RATE_EMAIL_BURST", "5"))
+LOGIN_RATE_EMAIL_PER_MINUTE = float(os.getenv("LOGIN_RATE_EMAIL_PER_MINUTE", "5"))
+
+# Attempts allowed at once and refill rate, per client IP
+LOGIN_RATE_IP_BURST = int(os.getenv("LOGIN_RATE_IP_BURST", "20"))
+LOGIN_RATE_IP_PER_MINUTE = float(os.getenv("LOGIN_RATE_IP_PER_MINUTE", "30"))
+
+# Buckets kept per kind; 0 disables login throttling
+LOGIN_THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "100000"))
+
+class TokenBucketLimiter:
+    """Token bucket per key, kept in a bounded LRU map. Thread-safe."""
+
+    def __init__(
+        self,
+        burst: int,
+        per_minute: float,
+        max_keys: int = LOGIN_THROTTLE_MAX_KEYS,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.burst = burst
+        self.rate = per_minute / 60
+        self.max_keys = max_keys
+        self.timer = timer
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def acquire(self, key: str) -> float:
+        """
+        Take one token for key. Returns 0 when allowed, otherwise the seconds
+        until a token will be available.
+        """
+        if self.max_keys <= 0:
+            return 0.0
+        now = self.timer()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+                self.allowed += 1
+            else:
+                retry_after = (1 - tokens) / self.rate if self.rate > 0 else math.inf
+                self.rejected += 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self.allowed = 0
+            self.rejected = 0
+
+    def stats(self) -> Dict[str, object]:
+        """Configuration, tracked keys and decision counters, for metrics endpoints"""
+        return {
+            "burst": self.burst,
+            "per_minute": round(self.rate * 60, 3),
+            "tracked": len(self._buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+class LoginThrottle:
+    """Per-IP and per-email limits applied together to each login attempt"""
+
+    def __init__(self, email_limiter: TokenBucketLimiter, ip_limiter: TokenBucketLimiter):
+        self.email_limiter = email_limiter
+        self.ip_limiter = ip_limiter
+
+    def check(self, email: str, ip: Optional[str]) -> float:
+        """
+        Record an attempt; 0 when allowed, otherwise seconds to wait. An IP
+        that is already over its limit does not drain the email's bucket, so
+        an attacker cannot lock a victim out from a single address.
+        """
+        if ip:
+            retry_after = self.ip_limiter.acquire(ip)
+            if retry_after:
+                return retry_after
+        return self.email_limiter.acquire(email.strip().lower())
+
+    def clear(self):
+        self.email_limiter.clear()
+        self.ip_limiter.clear()
+
+    def stats(self) -> Dict[str, object]:
+        return {"email": self.email_limiter.stats(), "ip": self.ip_limiter.stats()}
+
+# Throttle shared by every login request in this process
+login_throttle = LoginThrottle(
+    email_limiter=TokenBucketLimiter(LOGIN_RATE_EMAIL_BURST, LOGIN_RATE_EMAIL_PER_MINUTE),
+    ip_limiter=TokenBucketLimiter(LOGIN_RATE_IP_BURST, LOGIN_RATE_IP_PER_MINUTE),
+)
+
+def check_login_allowed(email: str, ip: Optional[str]):
+    """Raise 429 with Retry-After if this login attempt is over either limit"""
+    retry_after = login_throttle.check(email, ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(max(1, math.ceil(min(retry_after, 86400))))},
+        )
@@ -0,0 +1,43 @@
+"""
+Hot lookups shared by the auth layer and the routers
+
+The statements are built with lambda_stmt: the lambda's code location is the
+cache key, so the SELECT is constructed and compiled once per process and
+later calls only bind new parameter values. A plain select() is rebuilt and
+re-keyed for the compiled cache on every request.
+"""
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import StatementLambdaElement
+
+from app.models import Account, AccountHolder
+
+def holder_by_email_stmt(email: str) -> StatementLambdaElement:
+    """SELECT the account holder with the given email"""
+    return lambda_stmt(lambda: select(AccountHolder).where(AccountHolder.email == email))
+
+def account_for_holder_stmt(account_id: int, holder_id: int) -> StatementLambdaElement:
+    """SELECT an account only if it belongs to the given holder"""
+    return lambda_stmt(
+        lambda: select(Account).where(Account.id == account_id, Account.holder_id == holder_id)
+    )
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[AccountHolder]:
+    """Get user by email"""
+    result = await db.execute(holder_by_email_stmt(email))
+    return result.scalars().first()
+
+async def verify_account_ownership(account_id: int, current_user: AccountHolder, db: AsyncSession) -> Account:
+    """Verify that the account belongs to the current user"""
+    result = await db.execute(account_for_holder_stmt(account_id, current_user.id))
+    account = result.scalars().first()
+
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Account not found or access denied"
+        )
+
+    return account
@@ -6,6 +6,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
 
+from app.db import async_engine, async_read_engine
+from app.password_hashing import password_hash_pool
+from app.query_stats import QueryStatsMiddleware
+
 # Load environment variables
 load_dotenv()
 
@@ -23,10 +27,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Count SQL statements and DB time per request
+app.add_middleware(QueryStatsMiddleware)
+
 # Import routers (will be created in subsequent steps)
-from app.routers import auth, account_holders, accounts, transactions, transfers, cards, statements
+from app.routers import auth, account_holders, accounts, transactions, transfers, cards, statements, api_keys, internal
 
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["authentication"])
@@ -36,6 +44,20 @@ app.include_router(transactions.router, prefix="/api/v1/transactions", tags=["tr
 app.include_router(transfers.router, prefix="/api/v1/transfers", tags=["transfers"])
 app.include_router(cards.router, prefix="/api/v1/cards", tags=["cards"])
 app.include_router(statements.router, prefix="/api/v1/statements", tags=["statements"])
+app.include_router(api_keys.router, prefix="/api/v1/api-keys", tags=["api-keys"])
+app.include_router(internal.router, prefix="/internal", tags=["internal"], include_in_schema=False)
+
+@app.on_event("shutdown")
+async def dispose_engines():
+    """Close pooled async connections so their driver threads can exit"""
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
+@app.on_event("shutdown")
+async def stop_password_hashing():
+    """Stop the password hashing worker threads"""
+    password_hash_pool.shutdown()
 
 @app.get("/")
 async def root():
@@ -0,0 +1,185 @@
+"""
+Versioned schema migrations
+
+Migration scripts live in app/migrations/versions and are named
+NNNN_description.py. Each one defines a `description` string and an
+`upgrade(op)` function, and may set `transactional = False` when it has to run
+outside a transaction (for example to build indexes online on PostgreSQL).
+Applied versions are recorded in the schema_version table.
+
+Every operation is idempotent, so databases created earlier with
+Base.metadata.create_all can be brought under migration control by running
+the migrations against them.
+"""
+from datetime import datetime
+from typing import List, Optional, Set
+from sqlalchemy import Column, DateTime, Enum, Integer, MetaData, String, Table, inspect, text
+from sqlalchemy.dialects.postgresql.named_types import CreateEnumType
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+import importlib
+import pkgutil
+
+from app.migrations import versions
+
+# Bookkeeping table recording which migrations have been applied
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+class Migration:
+    """A single migration script"""
+
+    def __init__(self, version: int, name: str, module):
+        self.version = version
+        self.name = name
+        self.module = module
+        self.description = getattr(module, "description", name)
+        self.transactional = getattr(module, "transactional", True)
+
+    def __repr__(self):
+        return f"<Migration {self.version:04d} {self.name}>"
+
+class Operations:
+    """Schema operations available to migration scripts"""
+
+    def __init__(self, connection: Connection, dry_run: bool = False, created_types: Optional[Set[str]] = None):
+        self.connection = connection
+        self.dialect = connection.dialect
+        self.dry_run = dry_run
+        self.statements: List[str] = []
+        # Named types created so far in this run (shared across migrations, so
+        # a dry run does not plan the same CREATE TYPE twice)
+        self.created_types = created_types if created_types is not None else set()
+
+    def execute(self, sql: str):
+        """Run (or, in dry-run mode, only record) a SQL statement"""
+        self.statements.append(sql)
+        if not self.dry_run:
+            self.connection.execute(text(sql))
+
+    def _inspector(self):
+        # A fresh inspector every time: earlier steps may have changed the schema
+        return inspect(self.connection)
+
+    def has_table(self, table_name: str) -> bool:
+        return self._inspector().has_table(table_name)
+
+    def has_column(self, table_name: str, column_name: str) -> bool:
+        return any(c["name"] == column_name for c in self._inspector().get_columns(table_name))
+
+    def has_index(self, table_name: str, index_name: str) -> bool:
+        return any(i["name"] == index_name for i in self._inspector().get_indexes(table_name))
+
+    def has_type(self, type_name: str) -> bool:
+        """Whether a named (PostgreSQL enum) type exists or was created earlier in this run"""
+        return type_name in self.created_types or self.dialect.has_type(self.connection, type_name)
+
+    def create_enum_types(self, table: Table):
+        """
+        Create the named enum types a table's columns refer to. CreateTable
+        only references them; create_all emits them through DDL events, which
+        compiling the statement to a string bypasses.
+        """
+        if self.dialect.name != "postgresql":
+            return
+        for column in table.columns:
+            enum = column.type
+            if not isinstance(enum, Enum) or not enum.native_enum or not enum.name:
+                continue
+            if self.has_type(enum.name):
+                continue
+            self.execute(str(CreateEnumType(enum).compile(dialect=self.dialect)).strip())
+            self.created_types.add(enum.name)
+
+    def create_table(self, table: Table):
+        """Create a table, its enum types and the indexes defined on it unless it already exists"""
+        if self.has_table(table.name):
+            return
+        self.create_enum_types(table)
+        self.execute(str(CreateTable(table).compile(dialect=self.dialect)).strip())
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            self.execute(str(CreateIndex(index).compile(dialect=self.dialect)).strip())
+
+    def add_column(self, table_name: str, column: Column):
+        """Add a column to an existing table unless it is already there"""
+        if self.has_table(table_name) and self.has_column(table_name, column.name):
+            return
+        column_ddl = str(CreateColumn(column).compile(dialect=self.dialect)).strip()
+        self.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}")
+
+    def create_index(self, index_name: str, table_name: str, columns: List[str], unique: bool = False):
+        """
+        Create an index unless it already exists. On PostgreSQL the index is
+        built CONCURRENTLY so writes are not blocked; such migrations must set
+        `transactional = False`.
+        """
+        if self.has_table(table_name) and self.has_index(table_name, index_name):
+            return
+        online = "CONCURRENTLY " if self.dialect.name == "postgresql" else ""
+        unique_sql = "UNIQUE " if unique else ""
+        self.execute(
+            f"CREATE {unique_sql}INDEX {online}{index_name} ON {table_name} ({', '.join(columns)})"
+        )
+
+def load_migrations() -> List[Migration]:
+    """Discover migration scripts in version order"""
+    migrations = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        prefix, _, name = module_info.name.partition("_")
+        if not prefix.isdigit():
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        migrations.append(Migration(int(prefix), name, module))
+    migrations.sort(key=lambda m: m.version)
+    seen = set()
+    for migration in migrations:
+        if migration.version in seen:
+            raise RuntimeError(f"Duplicate migration version {migration.version:04d}")
+        seen.add(migration.version)
+    return migrations
+
+def applied_versions(engine: Engine) -> List[int]:
+    """Return the versions recorded in schema_version (empty for unmanaged databases)"""
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(schema_version.name):
+            return []
+        return [row[0] for row in conn.execute(schema_version.select().order_by(schema_version.c.version))]
+
+def pending_migrations(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    """Return migrations that have not been applied yet, up to an optional target version"""
+    applied = set(applied_versions(engine))
+    return [
+        m for m in load_migrations()
+        if m.version not in applied and (target is None or m.version <= target)
+    ]
+
+def migrate(engine: Engine, target: Optional[int] = None, dry_run: bool = False) -> List[tuple]:
+    """
+    Apply pending migrations in order. Returns (migration, statements) pairs;
+    in dry-run mode nothing is executed and the statements are what would run.
+    """
+    results = []
+    created_types: Set[str] = set()
+    if not dry_run:
+        schema_version.create(bind=engine, checkfirst=True)
+    for migration in pending_migrations(engine, target):
+        if migration.transactional:
+            connection_context = engine.begin()
+        else:
+            connection_context = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        with connection_context as conn:
+            op = Operations(conn, dry_run=dry_run, created_types=created_types)
+            migration.module.upgrade(op)
+            if not dry_run:
+                conn.execute(schema_version.insert().values(
+                    version=migration.version,
+                    description=migration.description,
+                    applied_at=datetime.utcnow(),
+                ))
+        results.append((migration, op.statements))
+    return results
@@ -0,0 +1,33 @@
+"""
+Command line entry point: python -m app.migrations [--status] [--dry-run] [--target N]
+"""
+import argparse
+
+from app.db import engine
+from app.migrations import applied_versions, load_migrations, migrate
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("--status", action="store_true", help="show applied and pending migrations and exit")
+    parser.add_argument("--dry-run", action="store_true", help="print the SQL that would run without executing it")
+    parser.add_argument("--target", type=int, help="stop after this version")
+    args = parser.parse_args()
+
+    if args.status:
+        applied = set(applied_versions(engine))
+        for migration in load_migrations():
+            state = "applied" if migration.version in applied else "pending"
+            print(f"{migration.version:04d}  {state:<8} {migration.description}")
+        return
+
+    results = migrate(engine, target=args.target, dry_run=args.dry_run)
+    if not results:
+        print("Database is up to date")
+    for migration, statements in results:
+        verb = "Would apply" if args.dry_run else "Applied"
+        print(f"{verb} {migration.version:04d}: {migration.description}")
+        for statement in statements:
+            print(f"    {statement};")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Initial schema: account holders, accounts, transactions and cards
+
+The tables are declared here rather than taken from app.models so that this
+migration keeps describing the original schema as the models evolve.
+"""
+from sqlalchemy import Boolean, Column, DateTime, Enum, Float, ForeignKey, Integer, MetaData, String, Table, Text
+from sqlalchemy.sql import func
+
+description = "Initial schema"
+
+metadata = MetaData()
+
+account_holders = Table(
+    "account_holders",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String(255), unique=True, index=True, nullable=False),
+    Column("full_name", String(255), nullable=False),
+    Column("hashed_password", String(255), nullable=False),
+    Column("role", String(50)),
+    Column("active", Boolean),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True)),
+)
+
+accounts = Table(
+    "accounts",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("holder_id", Integer, ForeignKey("account_holders.id"), nullable=False),
+    Column("type", Enum("CHECKING", "SAVINGS", name="accounttype"), nullable=False),
+    Column("balance", Float, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True)),
+)
+
+transactions = Table(
+    "transactions",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("account_id", Integer, ForeignKey("accounts.id"), nullable=False),
+    Column("type", Enum("DEPOSIT", "WITHDRAWAL", "TRANSFER", name="transactiontype"), nullable=False),
+    Column("amount", Float, nullable=False),
+    Column("description", Text),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+cards = Table(
+    "cards",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("account_id", Integer, ForeignKey("accounts.id"), nullable=False),
+    Column("holder_id", Integer, ForeignKey("account_holders.id"), nullable=False),
+    Column("masked_number", String(19), nullable=False),
+    Column("brand", String(50), nullable=False),
+    Column("last4", String(4), nullable=False),
+    Column("active", Boolean),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True)),
+)
+
+def upgrade(op):
+    for table in (account_holders, accounts, transactions, cards):
+        op.create_table(table)
@@ -0,0 +1,13 @@
+"""
+Composite indexes for per-account history, type counts and holder lookups
+"""
+description = "Hot query indexes"
+
+# Built online (CONCURRENTLY) on PostgreSQL, which cannot run in a transaction
+transactional = False
+
+def upgrade(op):
+    op.create_index("ix_transactions_account_id_created_at", "transactions", ["account_id", "created_at", "id"])
+    op.create_index("ix_transactions_account_id_type", "transactions", ["account_id", "type"])
+    op.create_index("ix_accounts_holder_id_id", "accounts", ["holder_id", "id"])
+    op.create_index("ix_cards_holder_id_account_id", "cards", ["holder_id", "account_id"])
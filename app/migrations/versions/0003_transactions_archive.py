@@ -0,0 +1,28 @@
+"""
+Archive table for transactions moved out of the hot transactions table
+"""
+from sqlalchemy import Column, DateTime, Enum, Float, ForeignKey, Index, Integer, MetaData, Table, Text
+from sqlalchemy.sql import func
+
+description = "Transactions archive"
+
+metadata = MetaData()
+
+# Referenced by the foreign key below; not created by this migration
+Table("accounts", metadata, Column("id", Integer, primary_key=True))
+
+transactions_archive = Table(
+    "transactions_archive",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("account_id", Integer, ForeignKey("accounts.id"), nullable=False),
+    Column("type", Enum("DEPOSIT", "WITHDRAWAL", "TRANSFER", name="transactiontype"), nullable=False),
+    Column("amount", Float, nullable=False),
+    Column("description", Text),
+    Column("created_at", DateTime(timezone=True)),
+    Column("archived_at", DateTime(timezone=True), server_default=func.now()),
+    Index("ix_transactions_archive_account_id_created_at", "account_id", "created_at", "id"),
+)
+
+def upgrade(op):
+    op.create_table(transactions_archive)
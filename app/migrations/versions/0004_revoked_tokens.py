@@ -0,0 +1,26 @@
+"""
+Revoked access tokens, loaded into the in-memory revocation list
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table
+from sqlalchemy.sql import func
+
+description = "Revoked tokens"
+
+metadata = MetaData()
+
+# Referenced by the foreign key below; not created by this migration
+Table("account_holders", metadata, Column("id", Integer, primary_key=True))
+
+revoked_tokens = Table(
+    "revoked_tokens",
+    metadata,
+    Column("token_digest", String(64), primary_key=True),
+    Column("holder_id", Integer, ForeignKey("account_holders.id")),
+    Column("expires_at", DateTime, nullable=False),
+    Column("revoked_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+    Index("ix_revoked_tokens_revoked_at", "revoked_at"),
+    Index("ix_revoked_tokens_expires_at", "expires_at"),
+)
+
+def upgrade(op):
+    op.create_table(revoked_tokens)
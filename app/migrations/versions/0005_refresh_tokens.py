@@ -0,0 +1,28 @@
+"""
+Refresh tokens for the /auth/refresh flow
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table
+from sqlalchemy.sql import func
+
+description = "Refresh tokens"
+
+metadata = MetaData()
+
+# Referenced by the foreign key below; not created by this migration
+Table("account_holders", metadata, Column("id", Integer, primary_key=True))
+
+refresh_tokens = Table(
+    "refresh_tokens",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("token_hash", String(64), unique=True, index=True, nullable=False),
+    Column("holder_id", Integer, ForeignKey("account_holders.id"), nullable=False),
+    Column("family_id", String(32), nullable=False),
+    Column("expires_at", DateTime, nullable=False),
+    Column("used_at", DateTime),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Index("ix_refresh_tokens_family_id", "family_id"),
+)
+
+def upgrade(op):
+    op.create_table(refresh_tokens)
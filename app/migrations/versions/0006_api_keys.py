@@ -0,0 +1,27 @@
+"""
+API keys for machine clients
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table
+from sqlalchemy.sql import func
+
+description = "API keys"
+
+metadata = MetaData()
+
+# Referenced by the foreign key below; not created by this migration
+Table("account_holders", metadata, Column("id", Integer, primary_key=True))
+
+api_keys = Table(
+    "api_keys",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("holder_id", Integer, ForeignKey("account_holders.id"), nullable=False, index=True),
+    Column("name", String(100), nullable=False),
+    Column("prefix", String(16), unique=True, index=True, nullable=False),
+    Column("key_hash", String(64), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("revoked_at", DateTime),
+)
+
+def upgrade(op):
+    op.create_table(api_keys)
@@ -0,0 +1,21 @@
+"""
+Indexes for transaction history filtered by type
+
+(account_id, type, created_at, id) lets a type-filtered keyset page seek
+straight to its cursor. The narrower (account_id, type) index stays for the
+per-type counts, which scan fewer pages through it.
+"""
+description = "Type-filtered transaction history indexes"
+
+# Built online (CONCURRENTLY) on PostgreSQL, which cannot run in a transaction
+transactional = False
+
+def upgrade(op):
+    op.create_index(
+        "ix_transactions_account_id_type_created_at", "transactions", ["account_id", "type", "created_at", "id"]
+    )
+    op.create_index(
+        "ix_transactions_archive_account_id_type_created_at",
+        "transactions_archive",
+        ["account_id", "type", "created_at", "id"],
+    )
@@ -0,0 +1,10 @@
+"""
+Row versions on accounts and cards, used to build ETags for conditional GETs
+"""
+from sqlalchemy import Column, Integer
+
+description = "Row versions for ETags"
+
+def upgrade(op):
+    op.add_column("accounts", Column("version", Integer, server_default="0", nullable=False))
+    op.add_column("cards", Column("version", Integer, server_default="0", nullable=False))
@@ -0,0 +1 @@
+# Migration scripts (NNNN_description.py), applied in version order
@@ -1,7 +1,7 @@
 """
 SQLAlchemy models for the Banking REST Service
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db import Base
@@ -43,6 +43,7 @@ class Account(Base):
     holder_id = Column(Integer, ForeignKey("account_holders.id"), nullable=False)
     type = Column(Enum(AccountType), nullable=False)
     balance = Column(Float, default=0.0, nullable=False)
+    version = Column(Integer, default=0, server_default="0", nullable=False)  # bumped by every update (ETags)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -50,6 +51,11 @@ class Account(Base):
     holder = relationship("AccountHolder", back_populates="accounts")
     transactions = relationship("Transaction", back_populates="account", cascade="all, delete-orphan")
     cards = relationship("Card", back_populates="account", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Ownership checks and account listings filter on holder_id
+        Index("ix_accounts_holder_id_id", "holder_id", "id"),
+    )
 
 class Transaction(Base):
     """Transaction model"""
@@ -64,6 +70,77 @@ class Transaction(Base):
     
     # Relationships
     account = relationship("Account", back_populates="transactions")
+    
+    __table_args__ = (
+        # Per-account history ordered by date (listings, statements, summaries)
+        Index("ix_transactions_account_id_created_at", "account_id", "created_at", "id"),
+        # Per-account counts by transaction type
+        Index("ix_transactions_account_id_type", "account_id", "type"),
+        # Per-account history filtered by type (keyset pages)
+        Index("ix_transactions_account_id_type_created_at", "account_id", "type", "created_at", "id"),
+    )
+
+class ArchivedTransaction(Base):
+    """Transaction moved out of the hot transactions table by app.archive"""
+    __tablename__ = "transactions_archive"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)  # keeps the original transaction id
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    type = Column(Enum(TransactionType), nullable=False)
+    amount = Column(Float, nullable=False)
+    description = Column(Text)
+    created_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # Per-account history ordered by date, mirroring the hot table
+        Index("ix_transactions_archive_account_id_created_at", "account_id", "created_at", "id"),
+        Index("ix_transactions_archive_account_id_type_created_at", "account_id", "type", "created_at", "id"),
+    )
+
+class RevokedToken(Base):
+    """Access token revoked before its expiry (logout / explicit revocation)"""
+    __tablename__ = "revoked_tokens"
+    
+    token_digest = Column(String(64), primary_key=True)  # hex SHA-256 of the token
+    holder_id = Column(Integer, ForeignKey("account_holders.id"))
+    expires_at = Column(DateTime, nullable=False)  # token exp (UTC); the row can be purged after it
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # Incremental sync of the in-memory revocation list, and purging
+        Index("ix_revoked_tokens_revoked_at", "revoked_at"),
+        Index("ix_revoked_tokens_expires_at", "expires_at"),
+    )
+
+class RefreshToken(Base):
+    """Refresh token (stored as a hash) used to obtain new access tokens without a password"""
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)  # hex SHA-256 of the token
+    holder_id = Column(Integer, ForeignKey("account_holders.id"), nullable=False)
+    family_id = Column(String(32), nullable=False)  # shared by every rotation of one login
+    expires_at = Column(DateTime, nullable=False)  # UTC
+    used_at = Column(DateTime)  # set when rotated or revoked; reuse afterwards revokes the family
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # Revoking a whole family on reuse or logout
+        Index("ix_refresh_tokens_family_id", "family_id"),
+    )
+
+class ApiKey(Base):
+    """API key for machine clients (stored as an HMAC digest)"""
+    __tablename__ = "api_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    holder_id = Column(Integer, ForeignKey("account_holders.id"), nullable=False, index=True)
+    name = Column(String(100), nullable=False)
+    prefix = Column(String(16), unique=True, index=True, nullable=False)  # public part, used for lookup
+    key_hash = Column(String(64), nullable=False)  # HMAC-SHA256 of the full key
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    revoked_at = Column(DateTime)  # UTC; revoked keys are rejected
 
 class Card(Base):
     """Card model"""
@@ -76,9 +153,15 @@ class Card(Base):
     brand = Column(String(50), nullable=False)  # VISA, MASTERCARD, etc.
     last4 = Column(String(4), nullable=False)
     active = Column(Boolean, default=True)
+    version = Column(Integer, default=0, server_default="0", nullable=False)  # bumped by every update (ETags)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     account = relationship("Account", back_populates="cards")
     holder = relationship("AccountHolder", back_populates="cards")
+    
+    __table_args__ = (
+        # Card listings per holder and per holder/account
+        Index("ix_cards_holder_id_account_id", "holder_id", "account_id"),
+    )
@@ -0,0 +1,40 @@
+"""
+Keyset (cursor) pagination helpers
+
+A cursor names the last row of a page by its sort key (created_at, id); the
+next page continues strictly after that key, so fetching page N costs the
+same as fetching page 1. Cursors are opaque to clients: URL-safe base64 of a
+small JSON document.
+"""
+from datetime import datetime
+from typing import Tuple
+from fastapi import HTTPException, status
+from dotenv import load_dotenv
+import base64
+import binascii
+import json
+import os
+
+# Load environment variables
+load_dotenv()
+
+# Page size when the client gives no limit, and the largest it may ask for
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor pointing just past the row with this sort key"""
+    document = json.dumps({"c": created_at.isoformat(), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(document.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Sort key carried by a cursor; 400 if it was not produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        document = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(document["c"]), int(document["i"])
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
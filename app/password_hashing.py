@@ -0,0 +1,117 @@
+"""
+Bounded worker pool for bcrypt hashing and verification
+
+bcrypt deliberately burns 100-300 ms of CPU per call. Run inline in an async
+handler that time is stolen from every other request on the event loop, so
+hashing runs on a small dedicated thread pool instead (the bcrypt extension
+releases the GIL while it works). The number of jobs waiting or running is
+capped: past PASSWORD_HASH_MAX_PENDING new jobs are rejected immediately
+rather than queueing without bound behind a login burst.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from dotenv import load_dotenv
+import asyncio
+import os
+import threading
+import time
+
+# Load environment variables
+load_dotenv()
+
+# Threads dedicated to password hashing
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Jobs allowed to be running or waiting at once; further jobs are rejected
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool already has PASSWORD_HASH_MAX_PENDING jobs"""
+
+class PasswordHashPool:
+    """Size-limited thread pool with queue-depth limit and timing metrics"""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+        self.peak_pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            return self._executor
+
+    async def run(self, fn: Callable, *args):
+        """Run fn(*args) on the pool and await its result"""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHashingBusy(f"{self.pending} password hashing jobs already pending")
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+            self.submitted += 1
+        submitted_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            with self._lock:
+                self.running += 1
+                self.total_wait += started_at - submitted_at
+                self.max_wait = max(self.max_wait, started_at - submitted_at)
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.total_run += time.perf_counter() - started_at
+
+        def job_done(_future):
+            # Runs when the job finishes or is cancelled before it started,
+            # even if the awaiting request has gone away
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+        future = self._get_executor().submit(job)
+        future.add_done_callback(job_done)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, object]:
+        """Queue depth, throughput counters and timings, for metrics endpoints"""
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "running": self.running,
+                "queued": self.pending - self.running,
+                "peak_pending": self.peak_pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait / completed * 1000, 3),
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "avg_run_ms": round(self.total_run / completed * 1000, 3),
+            }
+
+    def shutdown(self):
+        """Stop the worker threads (a new executor is created on next use)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+# Pool shared by signup and login
+password_hash_pool = PasswordHashPool()
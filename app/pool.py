@@ -0,0 +1,139 @@
+"""
+Connection pool configuration and live pool statistics
+"""
+from typing import Dict, Optional
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from dotenv import load_dotenv
+import os
+import threading
+import time
+
+# Load environment variables
+load_dotenv()
+
+# Pool configuration (defaults match SQLAlchemy's own defaults)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+DB_POOL_USE_LIFO = os.getenv("DB_POOL_USE_LIFO", "false").lower() == "true"
+
+class PoolStats:
+    """Checkout counters and wait times for one connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        """Record how long a caller waited to obtain a connection"""
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += seconds
+            self.last_wait = seconds
+            if seconds > self.max_wait:
+                self.max_wait = seconds
+
+    def snapshot(self) -> dict:
+        """Return the counters as a JSON-friendly dict (times in milliseconds)"""
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "checkout_wait_avg_ms": round(self.total_wait / attempts * 1000, 3) if attempts else 0.0,
+                "checkout_wait_max_ms": round(self.max_wait * 1000, 3),
+                "checkout_wait_last_ms": round(self.last_wait * 1000, 3),
+            }
+
+class _TimedCheckoutMixin:
+    """Pool mixin that measures how long each checkout waits for a connection"""
+
+    stats: Optional[PoolStats] = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.stats is not None:
+            self.stats.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep the same counters
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    """QueuePool that records checkout wait times"""
+
+class InstrumentedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait times"""
+
+def pool_options(url: str, is_async: bool = False) -> dict:
+    """
+    Build create_engine() pool arguments from the environment.
+    In-memory SQLite databases use a single shared connection, so they keep
+    SQLAlchemy's default pool and no sizing options are applied.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_use_lifo": DB_POOL_USE_LIFO,
+    }
+
+# Engines whose pools are reported by the internal metrics endpoint
+_registered_engines: Dict[str, Engine] = {}
+
+def register_engine(name: str, engine: Engine):
+    """Register an engine (use AsyncEngine.sync_engine for async engines) for pool reporting"""
+    if isinstance(engine.pool, _TimedCheckoutMixin) and engine.pool.stats is None:
+        engine.pool.stats = PoolStats()
+    _registered_engines[name] = engine
+
+def pool_status(engine: Engine) -> dict:
+    """Return live occupancy and wait statistics for an engine's pool"""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # overflow() is negative while the core pool is not yet filled
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+        })
+    else:
+        status["status"] = pool.status()
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
+
+def all_pool_status() -> dict:
+    """Return pool statistics for every registered engine"""
+    return {name: pool_status(engine) for name, engine in _registered_engines.items()}
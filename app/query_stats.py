@@ -0,0 +1,144 @@
+"""
+Per-request SQL statement counting and N+1 query budgets
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from dotenv import load_dotenv
+import logging
+import os
+import threading
+import time
+
+# Load environment variables
+load_dotenv()
+
+# Add X-DB-Query-Count / X-DB-Time-Ms headers to every response
+QUERY_STATS_HEADERS = os.getenv("QUERY_STATS_HEADERS", "false").lower() == "true"
+
+# Log a warning for requests that issue more statements than this (0 disables)
+QUERY_COUNT_WARN_THRESHOLD = int(os.getenv("QUERY_COUNT_WARN_THRESHOLD", "20"))
+
+logger = logging.getLogger("app.query_stats")
+
+class QueryStats:
+    """Statements executed and database time spent on behalf of one request"""
+
+    def __init__(self, method: str = "", path: str = "", scope: Optional[dict] = None):
+        self.method = method
+        self.path = path
+        self.scope = scope
+        self.count = 0
+        self.total_time = 0.0
+        self.statements: List[str] = []
+
+    @property
+    def route(self) -> str:
+        """Route template (e.g. /api/v1/accounts/{account_id}) once routing has happened"""
+        route = self.scope.get("route") if self.scope else None
+        return getattr(route, "path", None) or self.path
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        self.statements.append(statement)
+
+    @property
+    def total_time_ms(self) -> float:
+        return round(self.total_time * 1000, 3)
+
+# Stats for the request currently being served (None outside requests)
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+# Start times live on the statement's execution context rather than the
+# (pooled, long-lived) connection: after_cursor_execute does not fire for
+# statements that raise, and the context is discarded with them
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start_time = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_start_time", None)
+    elapsed = time.perf_counter() - started if started is not None else 0.0
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+# Lists receiving the stats of every finished request (used by assert_max_queries)
+_collectors: List[list] = []
+_collectors_lock = threading.Lock()
+
+class QueryStatsMiddleware:
+    """ASGI middleware that counts the SQL statements and DB time of each request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope["method"], scope["path"], scope)
+        token = current_query_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start" and QUERY_STATS_HEADERS:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(stats.count).encode()))
+                headers.append((b"x-db-time-ms", str(stats.total_time_ms).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            current_query_stats.reset(token)
+            self._report(stats)
+
+    def _report(self, stats: QueryStats):
+        logger.debug("%s %s: %d queries, %.3f ms", stats.method, stats.route, stats.count, stats.total_time_ms)
+        if QUERY_COUNT_WARN_THRESHOLD and stats.count > QUERY_COUNT_WARN_THRESHOLD:
+            logger.warning(
+                "%s %s issued %d SQL statements (threshold %d) - possible N+1 query",
+                stats.method, stats.route, stats.count, QUERY_COUNT_WARN_THRESHOLD,
+            )
+        with _collectors_lock:
+            for collector in _collectors:
+                collector.append(stats)
+
+@contextmanager
+def capture_request_queries():
+    """Collect the QueryStats of every request finished inside the block"""
+    collected: List[QueryStats] = []
+    with _collectors_lock:
+        _collectors.append(collected)
+    try:
+        yield collected
+    finally:
+        with _collectors_lock:
+            _collectors.remove(collected)
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """
+    Test helper: fail if any request made inside the block issues more than
+    `limit` SQL statements.
+
+        with assert_max_queries(3):
+            client.get("/api/v1/accounts/", headers=headers)
+    """
+    with capture_request_queries() as collected:
+        yield collected
+    over_budget = [stats for stats in collected if stats.count > limit]
+    if over_budget:
+        details = "\n".join(
+            f"{stats.method} {stats.route}: {stats.count} queries\n    " + "\n    ".join(stats.statements)
+            for stats in over_budget
+        )
+        raise AssertionError(f"Query budget of {limit} exceeded:\n{details}")
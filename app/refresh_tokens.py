@@ -0,0 +1,87 @@
+"""
+Refresh tokens with rotation
+
+Login hands out a long-lived refresh token next to the short-lived access
+token. POST /auth/refresh exchanges it for a new pair with one indexed hash
+lookup instead of a bcrypt password check. Every refresh token is single use:
+it is rotated on each exchange, and presenting an already-used token (a sign
+it was stolen) revokes every token descended from the same login.
+"""
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+import hashlib
+import os
+import secrets
+
+from app.models import AccountHolder, RefreshToken
+
+# Load environment variables
+load_dotenv()
+
+# Lifetime of a refresh token (each rotation starts a new lifetime)
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+
+def hash_refresh_token(token: str) -> str:
+    """Refresh tokens are random, so a plain SHA-256 is enough to store them safely"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def issue_refresh_token(db: AsyncSession, holder_id: int, family_id: Optional[str] = None) -> str:
+    """Add a new refresh token to the session (the caller commits) and return it"""
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        token_hash=hash_refresh_token(token),
+        holder_id=holder_id,
+        family_id=family_id or secrets.token_hex(16),
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+async def find_refresh_token(db: AsyncSession, token: str) -> Optional[RefreshToken]:
+    result = await db.execute(select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(token)))
+    return result.scalars().first()
+
+async def revoke_refresh_family(db: AsyncSession, family_id: str):
+    """Mark every unused token of a login as used so none can be exchanged (the caller commits)"""
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.used_at.is_(None))
+        .values(used_at=datetime.utcnow())
+    )
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> Tuple[AccountHolder, str]:
+    """Consume a refresh token and return its holder and the replacement token"""
+    stored = await find_refresh_token(db, token)
+    if stored is None or stored.expires_at <= datetime.utcnow():
+        raise invalid_refresh_token()
+
+    # Conditional update: of two concurrent exchanges of one token only one wins
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.used_at.is_(None))
+        .values(used_at=datetime.utcnow())
+    )
+    if result.rowcount != 1:
+        # Reuse of a rotated token: assume it leaked and end the whole login
+        await revoke_refresh_family(db, stored.family_id)
+        await db.commit()
+        raise invalid_refresh_token()
+
+    holder = await db.get(AccountHolder, stored.holder_id)
+    if holder is None or not holder.active:
+        await db.rollback()
+        raise invalid_refresh_token()
+
+    new_token = issue_refresh_token(db, holder.id, stored.family_id)
+    await db.commit()
+    return holder, new_token
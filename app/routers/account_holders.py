@@ -4,12 +4,12 @@ Account holders router
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
-from app.db import get_db
+from app.db import get_db, ReleaseSessionsRoute
 from app.models import AccountHolder
 from app.schemas import AccountHolderResponse
 from app.auth import get_current_active_user
 
-router = APIRouter()
+router = APIRouter(route_class=ReleaseSessionsRoute)
 
 @router.get("/me", response_model=AccountHolderResponse)
 async def get_current_user_profile(
@@ -1,22 +1,30 @@
 """
 Accounts router
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.db import get_db
+from app.db import get_async_db, get_read_db, ReleaseSessionsRoute
 from app.models import Account, AccountHolder
 from app.schemas import AccountCreate, AccountResponse, AccountWithTransactions
-from app.auth import get_current_active_user
+from app.auth import get_current_active_user, get_current_principal
+from app.archive import account_transactions
+from app.etags import account_version, etag_matches, holder_rows_version, make_etag, not_modified, rows_version, set_etag
+from app.lookups import verify_account_ownership
+from app.pagination import MAX_PAGE_SIZE
 
-router = APIRouter()
+router = APIRouter(route_class=ReleaseSessionsRoute)
+
+# Recent transactions embedded in GET /accounts/{id} unless the client asks otherwise
+DEFAULT_EMBEDDED_TRANSACTIONS = 10
 
 @router.post("/", response_model=AccountResponse, status_code=status.HTTP_201_CREATED)
 async def create_account(
     account_data: AccountCreate,
     current_user: AccountHolder = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new account for the current user
@@ -36,40 +44,58 @@ async def create_account(
     )
     
     db.add(db_account)
-    db.commit()
-    db.refresh(db_account)
+    await db.commit()
+    await db.refresh(db_account)
     
     return db_account
 
 @router.get("/", response_model=List[AccountResponse])
 async def list_accounts(
-    current_user: AccountHolder = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_user: AccountHolder = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    List all accounts for the current user
+    List all accounts for the current user (304 if If-None-Match still matches)
     """
-    accounts = db.query(Account).filter(Account.holder_id == current_user.id).all()
+    if request.headers.get("if-none-match"):
+        etag = make_etag("accounts", current_user.id, *await holder_rows_version(db, Account, current_user.id))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    
+    result = await db.execute(select(Account).where(Account.holder_id == current_user.id))
+    accounts = result.scalars().all()
+    set_etag(response, make_etag("accounts", current_user.id, *rows_version(accounts)))
     return accounts
 
 @router.get("/{account_id}", response_model=AccountWithTransactions)
 async def get_account(
     account_id: int,
-    current_user: AccountHolder = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    include_transactions: int = Query(DEFAULT_EMBEDDED_TRANSACTIONS, ge=0, le=MAX_PAGE_SIZE),
+    current_user: AccountHolder = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Get account by ID (only if owned by current user)
+    Get account by ID (only if owned by current user) with its most recent
+    transactions, newest first (?include_transactions=N, 0 for none).
+    304 if If-None-Match still matches.
     """
-    account = db.query(Account).filter(
-        Account.id == account_id,
-        Account.holder_id == current_user.id
-    ).first()
+    if request.headers.get("if-none-match"):
+        version = await account_version(db, account_id, current_user.id)
+        if version is not None:
+            etag = make_etag("account", account_id, version, include_transactions)
+            if etag_matches(request, etag):
+                return not_modified(etag)
     
-    if not account:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Account not found or access denied"
-        )
+    account = await verify_account_ownership(account_id, current_user, db)
+    set_etag(response, make_etag("account", account_id, account.version, include_transactions))
+    
+    # One limited, ordered query instead of loading the whole history
+    transactions = []
+    if include_transactions:
+        transactions = await account_transactions(db, account_id, limit=include_transactions)
     
-    return account
+    return {**AccountResponse.model_validate(account).model_dump(), "transactions": transactions}
@@ -0,0 +1,63 @@
+"""
+API keys router
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app.api_keys import issue_api_key, revoke_api_key
+from app.db import get_async_db, ReleaseSessionsRoute
+from app.models import AccountHolder, ApiKey
+from app.schemas import ApiKeyCreate, ApiKeyCreated, ApiKeyResponse
+from app.auth import ensure_active, get_current_active_user, get_current_user
+
+router = APIRouter(route_class=ReleaseSessionsRoute)
+
+@router.post("/", response_model=ApiKeyCreated, status_code=status.HTTP_201_CREATED)
+async def create_api_key(
+    key_data: ApiKeyCreate,
+    current_user: AccountHolder = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create an API key for the current user. Requires a login token, so a
+    leaked key cannot be used to mint more keys. The key is only shown once.
+    """
+    ensure_active(current_user)
+    api_key, key = issue_api_key(db, current_user.id, key_data.name)
+    await db.commit()
+    await db.refresh(api_key)
+    
+    return {**ApiKeyResponse.model_validate(api_key).model_dump(), "key": key}
+
+@router.get("/", response_model=List[ApiKeyResponse])
+async def list_api_keys(
+    current_user: AccountHolder = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    List the current user's API keys
+    """
+    result = await db.execute(select(ApiKey).where(ApiKey.holder_id == current_user.id).order_by(ApiKey.id))
+    return result.scalars().all()
+
+@router.delete("/{key_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_api_key(
+    key_id: int,
+    current_user: AccountHolder = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Revoke one of the current user's API keys
+    """
+    api_key = await db.get(ApiKey, key_id)
+    if api_key is None or api_key.holder_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="API key not found"
+        )
+    
+    if api_key.revoked_at is None:
+        revoke_api_key(api_key)
+        await db.commit()
@@ -1,39 +1,63 @@
 """
 Authentication router
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from datetime import timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, OAuth2PasswordRequestForm
+from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
+from app.db import get_async_db, ReleaseSessionsRoute
 from app.models import AccountHolder
-from app.schemas import AccountHolderCreate, AccountHolderResponse, TokenResponse
+from app.schemas import (
+    AccountHolderCreate,
+    AccountHolderResponse,
+    LogoutRequest,
+    RefreshRequest,
+    TokenResponse,
+    TokenRevokeRequest,
+)
 from app.auth import (
-    get_password_hash, 
+    get_password_hash_async,
     authenticate_user, 
-    create_access_token, 
+    create_user_access_token,
+    get_current_user,
     get_user_by_email,
-    ACCESS_TOKEN_EXPIRE_MINUTES
+    security,
+    verify_token,
+    SECRET_KEY,
+    ALGORITHM,
+)
+from app.login_throttle import check_login_allowed
+from app.refresh_tokens import (
+    find_refresh_token,
+    issue_refresh_token,
+    revoke_refresh_family,
+    rotate_refresh_token,
+    REFRESH_TOKEN_EXPIRE_DAYS,
 )
+from app.token_revocation import revoke_token, token_digest
 
-router = APIRouter()
+router = APIRouter(route_class=ReleaseSessionsRoute)
 
 @router.post("/signup", response_model=AccountHolderResponse, status_code=status.HTTP_201_CREATED)
-async def signup(user_data: AccountHolderCreate, db: Session = Depends(get_db)):
+async def signup(user_data: AccountHolderCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new account holder
     """
+    # Hash password first, on the hashing pool, so no database connection is
+    # checked out while it runs
+    hashed_password = await get_password_hash_async(user_data.password)
+    
     # Check if user already exists
-    existing_user = get_user_by_email(db, user_data.email)
+    existing_user = await get_user_by_email(db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Hash password and create user
-    hashed_password = get_password_hash(user_data.password)
+    # Create user
     db_user = AccountHolder(
         email=user_data.email,
         full_name=user_data.full_name,
@@ -42,17 +66,24 @@ async def signup(user_data: AccountHolderCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 @router.post("/login", response_model=TokenResponse)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Authenticate user and return JWT token
+    Authenticate user and return JWT access and refresh tokens
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    # Throttle before any query or password hashing is spent on the attempt
+    check_login_allowed(form_data.username, request.client.host if request.client else None)
+    
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -66,13 +97,73 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
             detail="Inactive user account"
         )
     
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+    access_token, expires_in = create_user_access_token(user)
+    refresh_token = issue_refresh_token(db, user.id)
+    await db.commit()
+    
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": expires_in,
+        "refresh_token": refresh_token,
+        "refresh_expires_in": REFRESH_TOKEN_EXPIRE_DAYS * 86400
+    }
+
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh(refresh_data: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Exchange a refresh token for a new access token and a new refresh token
+    (the presented one stops working); no password check involved
+    """
+    user, refresh_token = await rotate_refresh_token(db, refresh_data.refresh_token)
+    access_token, expires_in = create_user_access_token(user)
     
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        "expires_in": expires_in,
+        "refresh_token": refresh_token,
+        "refresh_expires_in": REFRESH_TOKEN_EXPIRE_DAYS * 86400
     }
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    logout_data: Optional[LogoutRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: AccountHolder = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Revoke the access token used for this request, and the refresh token
+    (with every token rotated from it) if one is given
+    """
+    if logout_data is not None and logout_data.refresh_token:
+        stored = await find_refresh_token(db, logout_data.refresh_token)
+        if stored is not None and stored.holder_id == current_user.id:
+            await revoke_refresh_family(db, stored.family_id)
+    
+    payload = verify_token(credentials.credentials)
+    await revoke_token(db, token_digest(credentials.credentials), payload["exp"], current_user.id)
+
+@router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke(
+    revoke_data: TokenRevokeRequest,
+    current_user: AccountHolder = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Revoke one of the current user's access tokens (e.g. from another device)
+    """
+    try:
+        payload = jwt.decode(revoke_data.token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        # Invalid or already expired tokens cannot be used anyway
+        return
+    
+    if payload.get("sub") != current_user.email:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cannot revoke another user's token"
+        )
+    
+    await revoke_token(db, token_digest(revoke_data.token), payload["exp"], current_user.id)
@@ -1,18 +1,21 @@
 """
 Cards router
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 import random
 import string
 
-from app.db import get_db
+from app.db import get_async_db, get_read_db, ReleaseSessionsRoute
 from app.models import Account, Card, AccountHolder
 from app.schemas import CardCreate, CardResponse, CardUpdate
-from app.auth import get_current_active_user
+from app.auth import get_current_active_user, get_current_principal
+from app.lookups import verify_account_ownership
+from app.etags import etag_matches, holder_rows_version, make_etag, not_modified, rows_version, set_etag
 
-router = APIRouter()
+router = APIRouter(route_class=ReleaseSessionsRoute)
 
 def generate_card_number():
     """Generate a masked card number for demo purposes"""
@@ -25,32 +28,17 @@ def generate_card_brand():
     brands = ["VISA", "MASTERCARD", "AMERICAN EXPRESS", "DISCOVER"]
     return random.choice(brands)
 
-def verify_account_ownership(account_id: int, current_user: AccountHolder, db: Session) -> Account:
-    """Verify that the account belongs to the current user"""
-    account = db.query(Account).filter(
-        Account.id == account_id,
-        Account.holder_id == current_user.id
-    ).first()
-    
-    if not account:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Account not found or access denied"
-        )
-    
-    return account
-
 @router.post("/", response_model=CardResponse, status_code=status.HTTP_201_CREATED)
 async def create_card(
     card_data: CardCreate,
     current_user: AccountHolder = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new card for the specified account
     """
     # Verify account ownership
-    account = verify_account_ownership(card_data.account_id, current_user, db)
+    account = await verify_account_ownership(card_data.account_id, current_user, db)
     
     # Verify the card is being created for the current user
     if card_data.holder_id != current_user.id:
@@ -75,38 +63,50 @@ async def create_card(
     )
     
     db.add(db_card)
-    db.commit()
-    db.refresh(db_card)
+    await db.commit()
+    await db.refresh(db_card)
     
     return db_card
 
 @router.get("/", response_model=List[CardResponse])
 async def list_cards(
-    current_user: AccountHolder = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_user: AccountHolder = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    List all cards for the current user
+    List all cards for the current user (304 if If-None-Match still matches)
     """
-    cards = db.query(Card).filter(Card.holder_id == current_user.id).all()
+    if request.headers.get("if-none-match"):
+        etag = make_etag("cards", current_user.id, *await holder_rows_version(db, Card, current_user.id))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    
+    result = await db.execute(select(Card).where(Card.holder_id == current_user.id))
+    cards = result.scalars().all()
+    set_etag(response, make_etag("cards", current_user.id, *rows_version(cards)))
     return cards
 
 @router.get("/account/{account_id}", response_model=List[CardResponse])
 async def list_account_cards(
     account_id: int,
-    current_user: AccountHolder = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AccountHolder = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     List all cards for a specific account owned by the current user
     """
     # Verify account ownership
-    account = verify_account_ownership(account_id, current_user, db)
+    account = await verify_account_ownership(account_id, current_user, db)
     
-    cards = db.query(Card).filter(
-        Card.account_id == account_id,
-        Card.holder_id == current_user.id
-    ).all()
+    result = await db.execute(
+        select(Card).where(
+            Card.account_id == account_id,
+            Card.holder_id == current_user.id
+        )
+    )
+    cards = result.scalars().all()
     
     return cards
 
@@ -115,15 +115,18 @@ async def update_card(
     card_id: int,
     card_update: CardUpdate,
     current_user: AccountHolder = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update card status (activate/deactivate)
     """
-    card = db.query(Card).filter(
-        Card.id == card_id,
-        Card.holder_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Card).where(
+            Card.id == card_id,
+            Card.holder_id == current_user.id
+        )
+    )
+    card = result.scalars().first()
     
     if not card:
         raise HTTPException(
@@ -136,7 +139,7 @@ async def update_card(
         card.active = card_update.active
     
     db.add(card)
-    db.commit()
-    db.refresh(card)
+    await db.commit()
+    await db.refresh(card)
     
     return card
@@ -0,0 +1,71 @@
+"""
+Internal operations router (metrics for operators, not for API clients)
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from typing import Optional
+from dotenv import load_dotenv
+import hmac
+import os
+
+from app.api_keys import api_key_cache
+from app.auth import token_cache
+from app.login_throttle import login_throttle
+from app.password_hashing import password_hash_pool
+from app.pool import all_pool_status
+from app.token_revocation import revoked_tokens
+from app.user_cache import user_cache
+
+# Load environment variables
+load_dotenv()
+
+# Internal endpoints require a matching X-Internal-Token header; while this
+# is unset they refuse every request
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+def verify_internal_token(x_internal_token: Optional[str] = Header(None)):
+    """Guard internal endpoints with INTERNAL_API_TOKEN (closed when it is not configured)"""
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Internal endpoints are disabled"
+        )
+    if not hmac.compare_digest(x_internal_token or "", INTERNAL_API_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid internal token"
+        )
+
+router = APIRouter(dependencies=[Depends(verify_internal_token)])
+
+@router.get("/db/pool")
+async def get_pool_stats():
+    """
+    Live connection pool statistics for every database engine
+    """
+    return all_pool_status()
+
+@router.get("/cache")
+async def get_cache_stats():
+    """
+    Size and hit/miss counters of the in-process caches
+    """
+    return {
+        "users": user_cache.stats(),
+        "tokens": token_cache.stats(),
+        "revoked_tokens": revoked_tokens.stats(),
+        "api_keys": api_key_cache.stats(),
+    }
+
+@router.get("/password-hashing")
+async def get_password_hashing_stats():
+    """
+    Queue depth, throughput and timings of the password hashing pool
+    """
+    return password_hash_pool.stats()
+
+@router.get("/login-throttle")
+async def get_login_throttle_stats():
+    """
+    Tracked keys and allowed/rejected login attempts, per email and per IP
+    """
+    return login_throttle.stats()
@@ -1,47 +1,33 @@
 """
 Statements router
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from fastapi import APIRouter, Depends, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import datetime, timedelta
 
-from app.db import get_db
-from app.models import Account, Transaction, TransactionType, AccountHolder
+from app.db import get_read_db, ReleaseSessionsRoute
+from app.models import Account, TransactionType, AccountHolder
 from app.schemas import StatementRequest, StatementResponse, TransactionResponse
-from app.auth import get_current_active_user
+from app.auth import get_current_principal
+from app.lookups import verify_account_ownership
+from app.archive import account_transactions, transaction_type_counts
 
-router = APIRouter()
-
-def verify_account_ownership(account_id: int, current_user: AccountHolder, db: Session) -> Account:
-    """Verify that the account belongs to the current user"""
-    account = db.query(Account).filter(
-        Account.id == account_id,
-        Account.holder_id == current_user.id
-    ).first()
-    
-    if not account:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Account not found or access denied"
-        )
-    
-    return account
+router = APIRouter(route_class=ReleaseSessionsRoute)
 
 @router.get("/{account_id}", response_model=StatementResponse)
 async def get_account_statement(
     account_id: int,
     start_date: Optional[datetime] = Query(None, description="Start date for statement (ISO format)"),
     end_date: Optional[datetime] = Query(None, description="End date for statement (ISO format)"),
-    current_user: AccountHolder = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AccountHolder = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get account statement with balance and transaction history
     """
     # Verify account ownership
-    account = verify_account_ownership(account_id, current_user, db)
+    account = await verify_account_ownership(account_id, current_user, db)
     
     # Set default date range if not provided
     if not end_date:
@@ -49,19 +35,9 @@ async def get_account_statement(
     if not start_date:
         start_date = end_date - timedelta(days=30)  # Last 30 days by default
     
-    # Build query for transactions
-    query = db.query(Transaction).filter(Transaction.account_id == account_id)
-    
-    # Apply date filters
-    query = query.filter(
-        and_(
-            Transaction.created_at >= start_date,
-            Transaction.created_at <= end_date
-        )
-    )
-    
-    # Get transactions ordered by date (newest first)
-    transactions = query.order_by(Transaction.created_at.desc()).all()
+    # Get transactions in the date range ordered by date (newest first);
+    # the archive is only read when the range reaches archived history
+    transactions = await account_transactions(db, account_id, start=start_date, end=end_date)
     
     # Calculate totals
     total_deposits = sum(
@@ -98,30 +74,22 @@ async def get_account_statement(
 @router.get("/{account_id}/summary")
 async def get_account_summary(
     account_id: int,
-    current_user: AccountHolder = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AccountHolder = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get quick account summary with current balance and recent activity
     """
     # Verify account ownership
-    account = verify_account_ownership(account_id, current_user, db)
+    account = await verify_account_ownership(account_id, current_user, db)
     
     # Get recent transactions (last 10)
-    recent_transactions = db.query(Transaction).filter(
-        Transaction.account_id == account_id
-    ).order_by(Transaction.created_at.desc()).limit(10).all()
-    
-    # Get transaction counts by type
-    deposit_count = db.query(Transaction).filter(
-        Transaction.account_id == account_id,
-        Transaction.type == TransactionType.DEPOSIT
-    ).count()
+    recent_transactions = await account_transactions(db, account_id, limit=10)
     
-    withdrawal_count = db.query(Transaction).filter(
-        Transaction.account_id == account_id,
-        Transaction.type == TransactionType.WITHDRAWAL
-    ).count()
+    # Get transaction counts by type (including archived history)
+    counts = await transaction_type_counts(db, account_id)
+    deposit_count = counts[TransactionType.DEPOSIT]
+    withdrawal_count = counts[TransactionType.WITHDRAWAL]
     
     return {
         "account_id": account_id,
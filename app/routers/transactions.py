@@ -1,46 +1,33 @@
 """
 Transactions router
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from decimal import Decimal
 
-from app.db import get_db
+from app.db import get_async_db, get_read_db, ReleaseSessionsRoute
 from app.models import Account, Transaction, TransactionType, AccountHolder
-from app.schemas import TransactionCreate, TransactionResponse
-from app.auth import get_current_active_user
+from app.schemas import TransactionBatchResponse, TransactionCreate, TransactionResponse
+from app.auth import get_current_active_user, get_current_principal
+from app.lookups import verify_account_ownership
+from app.archive import account_transactions
+from app.balances import change_balance, lock_balance, TRANSACTION_BATCH_MAX_ITEMS
+from app.pagination import decode_cursor, encode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
-router = APIRouter()
-
-def verify_account_ownership(account_id: int, current_user: AccountHolder, db: Session) -> Account:
-    """Verify that the account belongs to the current user"""
-    account = db.query(Account).filter(
-        Account.id == account_id,
-        Account.holder_id == current_user.id
-    ).first()
-    
-    if not account:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Account not found or access denied"
-        )
-    
-    return account
+router = APIRouter(route_class=ReleaseSessionsRoute)
 
 @router.post("/{account_id}", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
 async def create_transaction(
     account_id: int,
     transaction_data: TransactionCreate,
     current_user: AccountHolder = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a deposit or withdrawal transaction for the specified account
     """
-    # Verify account ownership
-    account = verify_account_ownership(account_id, current_user, db)
-    
     # Verify the transaction is for the correct account
     if transaction_data.account_id != account_id:
         raise HTTPException(
@@ -48,15 +35,23 @@ async def create_transaction(
             detail="Account ID mismatch"
         )
     
-    # Check for sufficient funds for withdrawals
-    if transaction_data.type == TransactionType.WITHDRAWAL:
-        if account.balance < transaction_data.amount:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Insufficient funds"
-            )
+    # Apply the balance change as one conditional UPDATE (ownership and, for
+    # withdrawals, sufficient funds are part of its WHERE clause)
+    delta = 0.0
+    if transaction_data.type == TransactionType.DEPOSIT:
+        delta = transaction_data.amount
+    elif transaction_data.type == TransactionType.WITHDRAWAL:
+        delta = -transaction_data.amount
+    if not await change_balance(db, account_id, current_user.id, delta):
+        # Nothing was changed; tell a missing or foreign account apart from
+        # insufficient funds
+        await verify_account_ownership(account_id, current_user, db)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Insufficient funds"
+        )
     
-    # Create transaction
+    # Create transaction in the same database transaction
     db_transaction = Transaction(
         account_id=account_id,
         type=transaction_data.type,
@@ -64,35 +59,129 @@ async def create_transaction(
         description=transaction_data.description
     )
     
-    # Update account balance
-    if transaction_data.type == TransactionType.DEPOSIT:
-        account.balance += transaction_data.amount
-    elif transaction_data.type == TransactionType.WITHDRAWAL:
-        account.balance -= transaction_data.amount
-    
     # Save to database
     db.add(db_transaction)
-    db.add(account)
-    db.commit()
-    db.refresh(db_transaction)
+    await db.commit()
+    await db.refresh(db_transaction)
     
     return db_transaction
 
+@router.post("/{account_id}/batch", response_model=TransactionBatchResponse)
+async def create_transaction_batch(
+    account_id: int,
+    items: List[TransactionCreate],
+    current_user: AccountHolder = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create many transactions for the specified account in one database
+    transaction. Items are applied in order; an item that names another
+    account or would overdraw the balance is rejected on its own without
+    affecting the rest. Returns one result per item.
+    """
+    if not items or len(items) > TRANSACTION_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch must contain between 1 and {TRANSACTION_BATCH_MAX_ITEMS} transactions"
+        )
+    
+    # One statement checks ownership, takes the row lock and reads the
+    # balance, which then cannot change under us until commit
+    balance = await lock_balance(db, account_id, current_user.id)
+    if balance is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Account not found or access denied"
+        )
+    
+    # Decide every item against the running balance
+    results = []
+    rows = []
+    net = 0.0
+    for index, item in enumerate(items):
+        error = None
+        delta = 0.0
+        if item.account_id != account_id:
+            error = "Account ID mismatch"
+        elif item.type == TransactionType.DEPOSIT:
+            delta = item.amount
+        elif item.type == TransactionType.WITHDRAWAL:
+            if balance + net < item.amount:
+                error = "Insufficient funds"
+            else:
+                delta = -item.amount
+        if error is not None:
+            results.append({"index": index, "status": "rejected", "error": error})
+            continue
+        net += delta
+        results.append({"index": index, "status": "created"})
+        rows.append({
+            "account_id": account_id,
+            "type": item.type,
+            "amount": item.amount,
+            "description": item.description,
+        })
+    
+    created = []
+    if not rows:
+        # Nothing to write: release the lock without keeping the version bump,
+        # so cached ETags of the account stay valid
+        await db.rollback()
+    else:
+        if net:
+            # Applies unconditionally: the row lock has held the balance steady
+            await change_balance(db, account_id, current_user.id, net)
+        
+        # Bulk INSERT of all accepted items, returning the new rows in the
+        # order the items were given (batched into one statement where the
+        # dialect can do that deterministically, e.g. PostgreSQL)
+        created = (await db.scalars(
+            insert(Transaction).returning(Transaction, sort_by_parameter_order=True),
+            rows
+        )).all()
+        await db.commit()
+    
+    created_rows = iter(created)
+    for result in results:
+        if result["status"] == "created":
+            result["transaction"] = next(created_rows)
+    
+    return {
+        "account_id": account_id,
+        "created": len(created),
+        "rejected": len(results) - len(created),
+        "balance": balance + net,
+        "results": results,
+    }
+
 @router.get("/{account_id}", response_model=List[TransactionResponse])
 async def list_transactions(
     account_id: int,
-    current_user: AccountHolder = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    transaction_type: Optional[TransactionType] = Query(None, alias="type"),
+    current_user: AccountHolder = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    List all transactions for the specified account
+    List transactions for the specified account, newest first, one page at a
+    time. When more transactions follow, the X-Next-Cursor response header
+    holds the cursor for the next page.
     """
+    before = decode_cursor(cursor) if cursor else None
+    
     # Verify account ownership
-    account = verify_account_ownership(account_id, current_user, db)
+    account = await verify_account_ownership(account_id, current_user, db)
     
-    # Get transactions ordered by creation date (newest first)
-    transactions = db.query(Transaction).filter(
-        Transaction.account_id == account_id
-    ).order_by(Transaction.created_at.desc()).all()
+    # One row beyond the page tells whether another page follows; includes
+    # any transactions that have been moved to the archive
+    transactions = await account_transactions(
+        db, account_id, limit=limit + 1, before=before, transaction_type=transaction_type
+    )
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        last = transactions[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
     
     return transactions
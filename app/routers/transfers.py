@@ -2,36 +2,22 @@
 Money transfers router
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
-from app.models import Account, Transaction, TransactionType, AccountHolder
+from app.db import get_async_db, ReleaseSessionsRoute
+from app.models import Transaction, TransactionType, AccountHolder
 from app.schemas import TransferRequest, TransferResponse
 from app.auth import get_current_active_user
+from app.balances import change_balance
+from app.lookups import verify_account_ownership
 
-router = APIRouter()
-
-def verify_account_ownership(account_id: int, current_user: AccountHolder, db: Session) -> Account:
-    """Verify that the account belongs to the current user"""
-    account = db.query(Account).filter(
-        Account.id == account_id,
-        Account.holder_id == current_user.id
-    ).first()
-    
-    if not account:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Account not found or access denied"
-        )
-    
-    return account
+router = APIRouter(route_class=ReleaseSessionsRoute)
 
 @router.post("/", response_model=TransferResponse, status_code=status.HTTP_201_CREATED)
 async def transfer_money(
     transfer_data: TransferRequest,
     current_user: AccountHolder = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Transfer money between two accounts owned by the current user
@@ -43,17 +29,6 @@ async def transfer_money(
             detail="Cannot transfer to the same account"
         )
     
-    # Verify both accounts belong to the current user
-    from_account = verify_account_ownership(transfer_data.from_account_id, current_user, db)
-    to_account = verify_account_ownership(transfer_data.to_account_id, current_user, db)
-    
-    # Check sufficient funds
-    if from_account.balance < transfer_data.amount:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Insufficient funds for transfer"
-        )
-    
     # Validate transfer amount
     if transfer_data.amount <= 0:
         raise HTTPException(
@@ -61,7 +36,25 @@ async def transfer_money(
             detail="Transfer amount must be positive"
         )
     
+    # Debit and credit as conditional UPDATEs (ownership and sufficient funds
+    # are checked in their WHERE clauses), taken in account id order so two
+    # opposite transfers cannot deadlock
+    deltas = {
+        transfer_data.from_account_id: -transfer_data.amount,
+        transfer_data.to_account_id: transfer_data.amount,
+    }
     try:
+        for account_id in sorted(deltas):
+            if not await change_balance(db, account_id, current_user.id, deltas[account_id]):
+                # Nothing will be committed; report a missing or foreign
+                # account, else insufficient funds
+                await verify_account_ownership(transfer_data.from_account_id, current_user, db)
+                await verify_account_ownership(transfer_data.to_account_id, current_user, db)
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Insufficient funds for transfer"
+                )
+        
         # Create debit transaction (withdrawal from source account)
         debit_transaction = Transaction(
             account_id=transfer_data.from_account_id,
@@ -78,32 +71,28 @@ async def transfer_money(
             description=f"Transfer from Account {transfer_data.from_account_id}: {transfer_data.description or 'Money transfer'}"
         )
         
-        # Update account balances
-        from_account.balance -= transfer_data.amount
-        to_account.balance += transfer_data.amount
-        
         # Save all changes to database
         db.add(debit_transaction)
         db.add(credit_transaction)
-        db.add(from_account)
-        db.add(to_account)
-        db.commit()
+        await db.commit()
         
         # Refresh to get the transaction ID
-        db.refresh(debit_transaction)
-        
-        return TransferResponse(
-            transaction_id=debit_transaction.id,
-            from_account_id=transfer_data.from_account_id,
-            to_account_id=transfer_data.to_account_id,
-            amount=transfer_data.amount,
-            created_at=debit_transaction.created_at
-        )
-        
+        await db.refresh(debit_transaction)
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
         # Rollback on any error
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Transfer failed due to database error"
         )
+    
+    return TransferResponse(
+        transaction_id=debit_transaction.id,
+        from_account_id=transfer_data.from_account_id,
+        to_account_id=transfer_data.to_account_id,
+        amount=transfer_data.amount,
+        created_at=debit_transaction.created_at
+    )
@@ -80,6 +80,21 @@ class TransactionResponse(TransactionBase):
     account_id: int
     created_at: datetime
 
+class TransactionBatchResult(BaseSchema):
+    """Outcome of one item of a transaction batch"""
+    index: int
+    status: str  # "created" or "rejected"
+    transaction: Optional[TransactionResponse] = None
+    error: Optional[str] = None
+
+class TransactionBatchResponse(BaseSchema):
+    """Schema for transaction batch response"""
+    account_id: int
+    created: int
+    rejected: int
+    balance: float
+    results: List[TransactionBatchResult]
+
 # Card schemas
 class CardBase(BaseSchema):
     """Base card schema"""
@@ -105,6 +120,23 @@ class CardResponse(CardBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
+# API key schemas
+class ApiKeyCreate(BaseSchema):
+    """Schema for creating an API key"""
+    name: str = Field(..., min_length=1, max_length=100)
+
+class ApiKeyResponse(BaseSchema):
+    """Schema for API key response (never includes the key itself)"""
+    id: int
+    name: str
+    prefix: str
+    created_at: datetime
+    revoked_at: Optional[datetime] = None
+
+class ApiKeyCreated(ApiKeyResponse):
+    """Schema for a newly created API key; the only time the key is shown"""
+    key: str
+
 # Authentication schemas
 class LoginRequest(BaseSchema):
     """Schema for login request"""
@@ -116,11 +148,25 @@ class TokenResponse(BaseSchema):
     access_token: str
     token_type: str = "bearer"
     expires_in: int
+    refresh_token: Optional[str] = None
+    refresh_expires_in: Optional[int] = None
 
 class TokenData(BaseSchema):
     """Schema for token data"""
     email: Optional[str] = None
 
+class TokenRevokeRequest(BaseSchema):
+    """Schema for revoking an access token"""
+    token: str = Field(..., min_length=1)
+
+class RefreshRequest(BaseSchema):
+    """Schema for exchanging a refresh token for new tokens"""
+    refresh_token: str = Field(..., min_length=1)
+
+class LogoutRequest(BaseSchema):
+    """Schema for logout; the refresh token, when given, is revoked too"""
+    refresh_token: Optional[str] = None
+
 # Transfer schemas
 class TransferRequest(BaseSchema):
     """Schema for money transfer request"""
@@ -0,0 +1,125 @@
+"""
+Slow query log: statements over a threshold are logged with their parameter
+shapes, duration, originating route and query plan
+"""
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from dotenv import load_dotenv
+import logging
+import os
+import time
+
+from app.query_stats import current_query_stats
+
+# Load environment variables
+load_dotenv()
+
+# Statements slower than this many milliseconds are logged (negative disables)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+
+# Capture EXPLAIN / EXPLAIN QUERY PLAN output for slow SELECT statements
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+
+logger = logging.getLogger("app.slow_query")
+
+# Prefix that produces a query plan for each dialect
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+    "mysql": "EXPLAIN ",
+}
+
+# Dialects where any failed statement aborts the surrounding transaction; the
+# EXPLAIN runs inside a savepoint there so a failure cannot break the request
+SAVEPOINT_DIALECTS = {"postgresql"}
+
+EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+def parameter_shape(parameters) -> str:
+    """Describe bound parameters by type only, so account data never reaches the log"""
+    if parameters is None:
+        return "()"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+def explain(conn, statement: str, parameters) -> Optional[List[str]]:
+    """
+    Return the query plan of a SELECT statement, or None when it cannot be
+    explained. Runs on the raw DBAPI connection so it neither fires engine
+    events nor disturbs the statement's own cursor, and never lets a failure
+    leak into the caller's transaction.
+    """
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    cursor = conn.connection.dbapi_connection.cursor()
+    savepoint = False
+    try:
+        if conn.dialect.name in SAVEPOINT_DIALECTS:
+            try:
+                cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+                savepoint = True
+            except Exception:
+                pass  # not inside a transaction block (autocommit): nothing to protect
+        cursor.execute(prefix + statement, parameters or ())
+        plan = [" | ".join(str(column) for column in row) for row in cursor.fetchall()]
+        if savepoint:
+            cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        return plan
+    except Exception as e:
+        if savepoint:
+            try:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            except Exception:
+                pass
+        return [f"<EXPLAIN failed: {e}>"]
+    finally:
+        cursor.close()
+
+def install_slow_query_log(engine: Engine, threshold_ms: float = SLOW_QUERY_MS, capture_plan: bool = SLOW_QUERY_EXPLAIN):
+    """
+    Log statements on this engine that take longer than threshold_ms.
+    For async engines pass AsyncEngine.sync_engine.
+    """
+    if threshold_ms < 0:
+        return
+    threshold = threshold_ms / 1000
+
+    # The start time lives on the execution context, which is discarded
+    # with a statement that raises (after_cursor_execute never fires for it)
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_slow_query_timer(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_start_time = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _log_slow_query(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_start_time", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed < threshold:
+            return
+
+        stats = current_query_stats.get()
+        route = f"{stats.method} {stats.route}" if stats is not None else "<no request>"
+        if executemany:
+            shape = f"{len(parameters)} x {parameter_shape(parameters[0])}" if parameters else "()"
+        else:
+            shape = parameter_shape(parameters)
+        plan = explain(conn, statement, parameters) if capture_plan and not executemany else None
+
+        message = f"Slow query ({elapsed * 1000:.1f} ms) from {route}\n  SQL: {statement}\n  Parameters: {shape}"
+        if plan:
+            message += "\n  Plan:\n    " + "\n    ".join(plan)
+        logger.warning(message, extra={
+            "duration_ms": round(elapsed * 1000, 3),
+            "route": route,
+            "statement": statement,
+            "parameter_shape": shape,
+            "plan": plan,
+        })
@@ -0,0 +1,66 @@
+"""
+SQLite tuning profiles applied to every new database connection
+"""
+from typing import Dict, List, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from dotenv import load_dotenv
+import os
+
+# Load environment variables
+load_dotenv()
+
+# Profile applied to SQLite engines: "default" (SQLite's own settings) or "performance"
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "default").lower()
+
+# Tunables used by the performance profile
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negative = KiB, i.e. 64 MiB
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+def profile_pragmas(profile: str) -> List[Tuple[str, object]]:
+    """Return the (pragma, value) pairs for a profile, in the order they must run"""
+    if profile == "default":
+        return []
+    if profile == "performance":
+        return [
+            # WAL lets readers run alongside the single writer and turns each
+            # commit into an append to the log instead of a journal rewrite
+            ("journal_mode", "WAL"),
+            # In WAL mode NORMAL only fsyncs at checkpoints; a power loss can
+            # drop the last commits but never corrupts the database
+            ("synchronous", "NORMAL"),
+            ("busy_timeout", SQLITE_BUSY_TIMEOUT_MS),
+            ("cache_size", SQLITE_CACHE_SIZE),
+            ("mmap_size", SQLITE_MMAP_SIZE),
+            ("temp_store", "MEMORY"),
+        ]
+    raise ValueError(f"Unknown SQLITE_PROFILE '{profile}' (expected 'default' or 'performance')")
+
+def apply_sqlite_profile(engine: Engine, profile: str = SQLITE_PROFILE):
+    """
+    Run the profile's PRAGMA statements on each new connection of a SQLite engine.
+    For async engines pass AsyncEngine.sync_engine.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = profile_pragmas(profile)
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+def current_pragmas(connection) -> Dict[str, object]:
+    """Read back the settings a profile controls from a live connection"""
+    names = ["journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store"]
+    return {
+        name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+        for name in names
+    }
@@ -0,0 +1,228 @@
+"""
+Access token revocation with O(1) in-memory checks
+
+Two mechanisms, both consulted without a database query per request:
+
+Revoked tokens (logout, POST /auth/revoke): each revoked token's SHA-256
+digest is persisted in the revoked_tokens table and held in memory in an
+exact set (digest -> exp) behind a Bloom filter. The filter answers "not
+revoked" for almost every live token from a few bit probes; only filter hits
+consult the set. Entries disappear once the token would have expired anyway.
+Each process loads the table on first use and then picks up revocations made
+by other processes every TOKEN_REVOCATION_SYNC_SECONDS.
+
+Holder claim changes: a stateless token carries holder_id, role and active.
+When a holder is deactivated, deleted, or has their role or email changed,
+tokens issued to them before that moment must stop working. The time of the
+last such change is kept per holder (in-process, fed by ORM events; other
+workers catch up when the short-lived token expires).
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional
+from sqlalchemy import delete, event, inspect, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+
+from app.models import AccountHolder, RevokedToken
+
+# Load environment variables
+load_dotenv()
+
+# Expected number of simultaneously revoked (unexpired) tokens; sizes the Bloom filter
+TOKEN_REVOCATION_CAPACITY = int(os.getenv("TOKEN_REVOCATION_CAPACITY", "100000"))
+
+# How often each process reloads revocations made by other processes
+TOKEN_REVOCATION_SYNC_SECONDS = float(os.getenv("TOKEN_REVOCATION_SYNC_SECONDS", "30"))
+
+# How far before the newest revoked_at already seen each sync looks again.
+# Timestamps may be stored with whole-second precision (SQLite) and rows
+# committed late may carry an older revoked_at; re-read rows are deduplicated
+# by digest.
+TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS = float(os.getenv("TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS", "5"))
+
+# Lifetime of stateless tokens (see app.auth): a claim change older than this
+# predates only tokens that have expired anyway
+STATELESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("STATELESS_TOKEN_EXPIRE_MINUTES", "5"))
+
+logger = logging.getLogger("app.token_revocation")
+
+def token_digest(token: str) -> bytes:
+    """SHA-256 digest identifying a token without storing it"""
+    return hashlib.sha256(token.encode()).digest()
+
+class BloomFilter:
+    """Fixed-size Bloom filter over SHA-256 digests"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest: bytes) -> Iterator[int]:
+        # The digest is already uniformly distributed: derive the k probe
+        # positions from two 64-bit slices (double hashing)
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, digest: bytes):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+class RevocationList:
+    """Revoked token digests: Bloom filter in front of an exact digest -> exp map"""
+
+    def __init__(self, capacity: int = TOKEN_REVOCATION_CAPACITY, sync_seconds: float = TOKEN_REVOCATION_SYNC_SECONDS):
+        self.capacity = capacity
+        self.sync_seconds = sync_seconds
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Forget everything, including when the list was last synced"""
+        with self._lock:
+            self._bloom = BloomFilter(self.capacity)
+            self._expires_at: Dict[bytes, float] = {}
+            self._synced_at: Optional[float] = None
+            self._high_water: Optional[datetime] = None
+            self.bloom_hits = 0
+
+    def add(self, digest: bytes, expires_at: float):
+        """Mark a token revoked until its exp"""
+        with self._lock:
+            self._expires_at[digest] = expires_at
+            self._bloom.add(digest)
+
+    def __contains__(self, digest: bytes) -> bool:
+        if digest not in self._bloom:
+            return False
+        self.bloom_hits += 1
+        expires_at = self._expires_at.get(digest)
+        return expires_at is not None and expires_at > time.time()
+
+    def purge_expired(self):
+        """Drop entries for tokens past their exp and rebuild the filter without them"""
+        now = time.time()
+        with self._lock:
+            live = {digest: exp for digest, exp in self._expires_at.items() if exp > now}
+            if len(live) == len(self._expires_at):
+                return
+            bloom = BloomFilter(self.capacity)
+            for digest in live:
+                bloom.add(digest)
+            self._expires_at, self._bloom = live, bloom
+
+    async def sync(self, db: AsyncSession, force: bool = False):
+        """
+        Load revocations persisted since the last sync (everything on first
+        use). Cheap no-op unless TOKEN_REVOCATION_SYNC_SECONDS have passed.
+        """
+        now = time.monotonic()
+        if not force and self._synced_at is not None and now - self._synced_at < self.sync_seconds:
+            return
+        self._synced_at = now
+
+        query = select(RevokedToken.token_digest, RevokedToken.expires_at, RevokedToken.revoked_at).where(
+            RevokedToken.expires_at > datetime.utcnow()
+        )
+        if self._high_water is not None:
+            query = query.where(
+                RevokedToken.revoked_at >= self._high_water - timedelta(seconds=TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS)
+            )
+        try:
+            rows = (await db.execute(query)).all()
+        except SQLAlchemyError as e:
+            logger.warning("Could not load revoked tokens: %s", e)
+            await db.rollback()
+            return
+        for digest_hex, expires_at, revoked_at in rows:
+            self.add(bytes.fromhex(digest_hex), _utc_timestamp(expires_at))
+            if self._high_water is None or revoked_at > self._high_water:
+                self._high_water = revoked_at
+        self.purge_expired()
+
+    def stats(self) -> Dict[str, object]:
+        """Size and filter counters, for metrics endpoints"""
+        return {
+            "revoked": len(self._expires_at),
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hash_count,
+            "bloom_hits": self.bloom_hits,
+        }
+
+def _utc_timestamp(value: datetime) -> float:
+    return (value.replace(tzinfo=None) - datetime(1970, 1, 1)).total_seconds()
+
+# Revocation list shared by every request in this process
+revoked_tokens = RevocationList()
+
+def is_token_revoked(digest: bytes) -> bool:
+    """O(1) check against the in-memory revocation list"""
+    return digest in revoked_tokens
+
+async def revoke_token(db: AsyncSession, digest: bytes, expires_at: float, holder_id: Optional[int] = None):
+    """Persist a revocation (also purging expired rows) and apply it to this process"""
+    revoked_tokens.add(digest, expires_at)
+    if await db.get(RevokedToken, digest.hex()) is None:
+        db.add(RevokedToken(
+            token_digest=digest.hex(),
+            holder_id=holder_id,
+            expires_at=datetime.utcfromtimestamp(expires_at),
+        ))
+    await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+    await db.commit()
+
+# holder_id -> time.time() of the last claim-changing update, oldest first
+_claims_changed_at: "OrderedDict[int, float]" = OrderedDict()
+_claims_lock = threading.Lock()
+
+# Attributes whose change invalidates the identity claims in issued tokens
+CLAIM_ATTRIBUTES = ("active", "role", "email")
+
+def revoke_holder_tokens(holder_id: int):
+    """Reject every stateless token issued to a holder before now"""
+    now = time.time()
+    with _claims_lock:
+        _claims_changed_at.pop(holder_id, None)
+        _claims_changed_at[holder_id] = now
+        # Changes older than a stateless token's lifetime no longer matter;
+        # entries are in time order, so they sit at the front
+        horizon = now - STATELESS_TOKEN_EXPIRE_MINUTES * 60
+        while _claims_changed_at:
+            oldest_id, changed_at = next(iter(_claims_changed_at.items()))
+            if changed_at > horizon:
+                break
+            del _claims_changed_at[oldest_id]
+
+def holder_tokens_revoked(holder_id: int, issued_at: float) -> bool:
+    """Whether a token issued at issued_at predates a claim change for the holder"""
+    changed_at = _claims_changed_at.get(holder_id)
+    return changed_at is not None and issued_at < changed_at
+
+def clear():
+    """Reset all in-memory revocation state"""
+    with _claims_lock:
+        _claims_changed_at.clear()
+    revoked_tokens.clear()
+
+@event.listens_for(AccountHolder, "after_update")
+def _revoke_on_claim_change(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in CLAIM_ATTRIBUTES):
+        revoke_holder_tokens(target.id)
+
+@event.listens_for(AccountHolder, "after_delete")
+def _revoke_on_delete(mapper, connection, target):
+    revoke_holder_tokens(target.id)
@@ -0,0 +1,74 @@
+"""
+Cache of authenticated account holders, keyed by token subject (email)
+
+get_current_user runs on every authenticated request; with the cache most
+requests rebuild the AccountHolder from a column snapshot instead of
+querying the database. Entries are dropped as soon as a holder is inserted,
+updated (e.g. deactivated) or deleted through the ORM in this process, and
+expire after USER_CACHE_TTL_SECONDS in any case, which bounds staleness for
+changes made by other processes.
+"""
+from typing import Dict, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from dotenv import load_dotenv
+import os
+
+from app.cache import TTLCache
+from app.models import AccountHolder
+
+# Load environment variables
+load_dotenv()
+
+# Maximum cached holders (0 disables the cache) and how long entries live
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+
+def snapshot(user: AccountHolder) -> Dict[str, object]:
+    """Column values of a loaded holder"""
+    return {attr.key: getattr(user, attr.key) for attr in inspect(AccountHolder).column_attrs}
+
+async def get_cached_user(db: AsyncSession, email: str) -> Optional[AccountHolder]:
+    """
+    Return the holder for email from the cache, attached to db without a
+    query, or None on a miss
+    """
+    values = user_cache.get(email)
+    if values is None:
+        return None
+    user = AccountHolder(**values)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+def cache_user(email: str, user: AccountHolder):
+    """Remember a holder freshly loaded from the database"""
+    user_cache.set(email, snapshot(user))
+
+def invalidate_user(email: str):
+    """Forget a cached holder"""
+    user_cache.pop(email)
+
+def _emails_of(target: AccountHolder):
+    # Current email plus the previous one if it was just changed
+    history = inspect(target).attrs.email.history
+    return {e for e in [target.email, *history.deleted] if e}
+
+@event.listens_for(AccountHolder, "after_insert")
+@event.listens_for(AccountHolder, "after_update")
+@event.listens_for(AccountHolder, "after_delete")
+def _invalidate_changed_holder(mapper, connection, target):
+    """Drop the holder now and again on commit, in case a reader re-cached the old row meanwhile"""
+    emails = _emails_of(target)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("invalidated_users", set()).update(emails)
+    for email in emails:
+        invalidate_user(email)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_holders(session):
+    for email in session.info.pop("invalidated_users", ()):
+        invalidate_user(email)
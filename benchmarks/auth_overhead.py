@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-request cost of authenticating a bearer token
+
+Usage: python -m benchmarks.auth_overhead [--calls 20000] [--requests 500]
+
+Measures verify_token with the verified-token cache disabled (a full
+jwt.decode with HMAC verification every call) and enabled (a client reusing
+its token), then the latency of an authenticated GET /api/v1/accounts/
+in both configurations.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import app.auth as auth
+from app.cache import TTLCache
+from app.db import Base, get_async_db, get_read_db
+from app.main import app
+
+def per_call_us(fn, calls):
+    for _ in range(100):
+        fn()
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+def use_token_cache(enabled):
+    auth.token_cache = TTLCache(auth.TOKEN_CACHE_SIZE if enabled else 0, ttl=auth.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+def api_client(path):
+    """TestClient on a fresh database with one logged-in holder"""
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{path}"))
+    session_factory = async_sessionmaker(
+        bind=create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool),
+        expire_on_commit=False,
+    )
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_read_db] = override_get_async_db
+    client = TestClient(app)
+    user = {"email": "bench@example.com", "full_name": "Bench", "password": "benchpass123"}
+    client.post("/api/v1/auth/signup", json=user)
+    token = client.post("/api/v1/auth/login", data={"username": user["email"], "password": user["password"]}).json()["access_token"]
+    return client, {"Authorization": f"Bearer {token}"}, token
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client, headers, token = api_client(os.path.join(tmp, "bench.db"))
+        with client:
+            print(f"{'token cache':<12} {'verify_token (µs)':>18} {'GET /accounts (ms)':>19}")
+            for enabled in (False, True):
+                use_token_cache(enabled)
+                verify = per_call_us(lambda: auth.verify_token(token), args.calls)
+                request = per_call_us(lambda: client.get("/api/v1/accounts/", headers=headers), args.requests) / 1000
+                print(f"{'on' if enabled else 'off':<12} {verify:>18.1f} {request:>19.2f}")
+    app.dependency_overrides.clear()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark login latency for each password hash cost
+
+Usage: python -m benchmarks.password_cost [--scheme bcrypt] [--costs 10,11,12,13] [--logins 30]
+
+For each cost, signs up a holder whose password is hashed at that cost and
+reports p50/p99 of the hash verification alone and of a full POST
+/api/v1/auth/login. Pick the highest cost whose login p99 fits the latency
+budget, then set PASSWORD_HASH_SCHEME / PASSWORD_HASH_ROUNDS; existing
+hashes are upgraded as their owners log in.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import app.auth as auth
+from app.db import Base, get_async_db, get_read_db
+from app.login_throttle import login_throttle
+from app.main import app
+
+def percentiles_ms(samples):
+    """p50 and p99 of durations in seconds, in milliseconds"""
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return cuts[49] * 1000, cuts[98] * 1000
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def use_database(path):
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{path}"))
+    session_factory = async_sessionmaker(
+        bind=create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool),
+        expire_on_commit=False,
+    )
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_read_db] = override_get_async_db
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scheme", default=auth.PASSWORD_HASH_SCHEME)
+    parser.add_argument("--costs", default="10,11,12,13", help="comma-separated rounds to compare")
+    parser.add_argument("--logins", type=int, default=30)
+    args = parser.parse_args()
+
+    password = "benchpass123"
+    with tempfile.TemporaryDirectory() as tmp:
+        use_database(os.path.join(tmp, "bench.db"))
+        with TestClient(app) as client:
+            print(f"{args.scheme + ' cost':<14} {'verify p50':>11} {'verify p99':>11} {'login p50':>11} {'login p99':>11}  (ms)")
+            for cost in [int(c) for c in args.costs.split(",")]:
+                auth.pwd_context = auth.make_pwd_context(args.scheme, cost)
+                hashed = auth.get_password_hash(password)
+                verify = percentiles_ms(timed(lambda: auth.verify_password(password, hashed), args.logins))
+
+                user = {"email": f"bench-{cost}@example.com", "full_name": "Bench", "password": password}
+                client.post("/api/v1/auth/signup", json=user)
+                form = {"username": user["email"], "password": password}
+
+                def login():
+                    login_throttle.clear()
+                    assert client.post("/api/v1/auth/login", data=form).status_code == 200
+
+                login_ms = percentiles_ms(timed(login, args.logins))
+                print(f"{cost:<14} {verify[0]:>11.1f} {verify[1]:>11.1f} {login_ms[0]:>11.1f} {login_ms[1]:>11.1f}")
+    app.dependency_overrides.clear()
+
+if __name__ == "__main__":
+    main()
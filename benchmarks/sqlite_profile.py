@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark SQLite write/read throughput for each SQLITE_PROFILE
+
+Usage: python -m benchmarks.sqlite_profile [--writes 2000] [--reads 2000]
+
+Writes mirror create_transaction (insert a transaction, update the balance,
+commit). Reads mirror list_transactions and run while a second thread keeps
+writing, which is where rollback-journal mode blocks readers.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import Account, AccountHolder, AccountType, Transaction, TransactionType
+from app.sqlite_profile import apply_sqlite_profile, current_pragmas
+
+PROFILES = ["default", "performance"]
+
+def make_engine(path, profile):
+    """Create a fresh database file with the given profile applied"""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    apply_sqlite_profile(engine, profile)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+def seed(Session):
+    """Create one holder with one account and return the account id"""
+    with Session() as db:
+        holder = AccountHolder(email="bench@example.com", full_name="Bench", hashed_password="x")
+        db.add(holder)
+        db.flush()
+        account = Account(holder_id=holder.id, type=AccountType.CHECKING, balance=0.0)
+        db.add(account)
+        db.commit()
+        return account.id
+
+def write_once(Session, account_id):
+    """One deposit, committed on its own like create_transaction"""
+    with Session() as db:
+        account = db.get(Account, account_id)
+        db.add(Transaction(account_id=account_id, type=TransactionType.DEPOSIT, amount=1.0))
+        account.balance += 1.0
+        db.commit()
+
+def bench_writes(Session, account_id, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        write_once(Session, account_id)
+    return count / (time.perf_counter() - start)
+
+def bench_reads_under_writes(Session, account_id, count):
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            write_once(Session, account_id)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        query = (
+            select(Transaction)
+            .where(Transaction.account_id == account_id)
+            .order_by(Transaction.created_at.desc())
+            .limit(50)
+        )
+        start = time.perf_counter()
+        for _ in range(count):
+            with Session() as db:
+                db.execute(query).scalars().all()
+        return count / (time.perf_counter() - start)
+    finally:
+        stop.set()
+        thread.join()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'profile':<12} {'journal':<8} {'writes/s':>10} {'reads/s (with writer)':>22}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in PROFILES:
+            engine = make_engine(os.path.join(tmp, f"{profile}.db"), profile)
+            Session = sessionmaker(bind=engine, autoflush=False)
+            account_id = seed(Session)
+            with engine.connect() as conn:
+                journal = current_pragmas(conn)["journal_mode"]
+            writes = bench_writes(Session, account_id, args.writes)
+            reads = bench_reads_under_writes(Session, account_id, args.reads)
+            print(f"{profile:<12} {journal:<8} {writes:>10.0f} {reads:>22.0f}")
+            engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,8 @@ class BankingClient:
     def __init__(self, base_url="http://localhost:8000"):
         self.base_url = base_url
         self.token = None
+        self.token_expires_at = None
+        self.refresh_token = None
         self.user_id = None
         self.accounts = {}
     
@@ -49,16 +51,41 @@ class BankingClient:
         response = requests.post(f"{self.base_url}/api/v1/auth/login", data=login_data)
         
         if response.status_code == 200:
-            token_data = response.json()
-            self.token = token_data["access_token"]
+            self._store_tokens(response.json())
             print(f"   ✅ Login successful")
             return True
         else:
             print(f"   ❌ Login failed: {response.text}")
             return False
     
+    def _store_tokens(self, token_data):
+        """Remember the access token, when it expires, and the refresh token"""
+        self.token = token_data["access_token"]
+        self.token_expires_at = time.time() + token_data["expires_in"]
+        self.refresh_token = token_data.get("refresh_token")
+    
+    def refresh(self):
+        """Get a new access token with the refresh token (no password needed)"""
+        if not self.refresh_token:
+            return False
+        
+        response = requests.post(
+            f"{self.base_url}/api/v1/auth/refresh",
+            json={"refresh_token": self.refresh_token}
+        )
+        
+        if response.status_code == 200:
+            self._store_tokens(response.json())
+            return True
+        else:
+            print(f"   ❌ Token refresh failed: {response.text}")
+            self.token = self.refresh_token = None
+            return False
+    
     def get_headers(self):
-        """Get authentication headers"""
+        """Get authentication headers, refreshing the access token shortly before it expires"""
+        if self.token and self.token_expires_at - time.time() < 30:
+            self.refresh()
         if not self.token:
             raise Exception("Not authenticated. Please login first.")
         return {"Authorization": f"Bearer {self.token}"}
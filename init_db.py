@@ -1,38 +1,52 @@
 #!/usr/bin/env python3
 """
 Database initialization script for Banking REST Service
-Run this script to create all required database tables.
+Run this script to create all required database tables, or to upgrade an
+existing database to the latest schema. Pass --dry-run to print the SQL
+without executing it.
 """
+import sys
 
-from app.db import engine, Base
-from app.models import AccountHolder, Account, Transaction, Card
+from sqlalchemy import inspect
 
-def init_database():
-    """Create all database tables"""
+from app.db import engine
+from app.migrations import migrate
+
+def init_database(dry_run: bool = False):
+    """Apply all pending schema migrations"""
     print("🏦 Banking REST Service - Database Initialization")
     print("=" * 50)
-    
+
     try:
-        print("📊 Creating database tables...")
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database tables created successfully!")
-        
+        print("📊 Applying schema migrations...")
+        results = migrate(engine, dry_run=dry_run)
+        if not results:
+            print("✅ Database schema is already up to date!")
+        for migration, statements in results:
+            if dry_run:
+                print(f"📝 Would apply {migration.version:04d}: {migration.description}")
+                for statement in statements:
+                    print(f"    {statement};")
+            else:
+                print(f"✅ Applied {migration.version:04d}: {migration.description}")
+
+        if dry_run:
+            print("\n💡 Dry run only - no changes were made.")
+            return True
+
         # Verify tables were created
-        from sqlalchemy import text
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table'"))
-            tables = [row[0] for row in result]
-            print(f"📋 Created tables: {', '.join(tables)}")
-        
+        tables = inspect(engine).get_table_names()
+        print(f"📋 Tables: {', '.join(tables)}")
+
         print("\n🎉 Database initialization complete!")
         print("💡 You can now start the server with: uvicorn app.main:app --reload")
-        
+
     except Exception as e:
         print(f"❌ Error creating database tables: {e}")
         return False
-    
+
     return True
 
 if __name__ == "__main__":
-    success = init_database()
+    success = init_database(dry_run="--dry-run" in sys.argv[1:])
     exit(0 if success else 1)
@@ -0,0 +1,65 @@
+"""
+Shared fixtures: an isolated SQLite database and API client per test
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.routers import internal
+from app.db import Base, get_async_db, get_read_db
+from app import token_revocation
+from app.api_keys import api_key_cache
+from app.login_throttle import login_throttle
+from app.user_cache import user_cache
+
+@pytest.fixture(autouse=True)
+def reset_login_throttle():
+    """Tests log in far more often than the throttle allows; start each one fresh"""
+    login_throttle.clear()
+
+@pytest.fixture
+def isolated_db(tmp_path, monkeypatch):
+    """Point the API at a fresh database file for the duration of one test"""
+    path = tmp_path / "api.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=sync_engine)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    session_factory = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    monkeypatch.setitem(app.dependency_overrides, get_async_db, override_get_async_db)
+    monkeypatch.setitem(app.dependency_overrides, get_read_db, override_get_async_db)
+    user_cache.clear()
+    api_key_cache.clear()
+    token_revocation.clear()
+    yield sync_engine
+    sync_engine.dispose()
+
+@pytest.fixture
+def api_client(isolated_db):
+    """TestClient bound to the isolated database"""
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def api_user(api_client):
+    """Sign up and log in a user; returns (holder_id, auth headers)"""
+    user = {"email": "fixture@example.com", "full_name": "Fixture User", "password": "fixturepass123"}
+    assert api_client.post("/api/v1/auth/signup", json=user).status_code == 201
+    response = api_client.post("/api/v1/auth/login", data={"username": user["email"], "password": user["password"]})
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    holder_id = api_client.get("/api/v1/account-holders/me", headers=headers).json()["id"]
+    return holder_id, headers
+
+@pytest.fixture
+def internal_headers(monkeypatch):
+    """Configure INTERNAL_API_TOKEN; returns headers that pass the internal guard"""
+    monkeypatch.setattr(internal, "INTERNAL_API_TOKEN", "test-internal-token")
+    return {"X-Internal-Token": "test-internal-token"}
@@ -0,0 +1,48 @@
+"""
+Tests for the bounded transaction embedding in GET /accounts/{id}
+"""
+import pytest
+
+from app.query_stats import capture_request_queries
+
+@pytest.fixture
+def account_with_history(api_client, api_user):
+    """An account with 12 deposits of 1..12"""
+    holder_id, headers = api_user
+    account_id = api_client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "CHECKING"}, headers=headers).json()["id"]
+    for amount in range(1, 13):
+        api_client.post(
+            f"/api/v1/transactions/{account_id}",
+            json={"account_id": account_id, "type": "DEPOSIT", "amount": amount},
+            headers=headers,
+        )
+    return account_id, headers
+
+def test_default_embeds_recent_transactions_only(api_client, account_with_history):
+    """Without a parameter only the 10 newest transactions are embedded"""
+    account_id, headers = account_with_history
+    account = api_client.get(f"/api/v1/accounts/{account_id}", headers=headers).json()
+    assert account["balance"] == 78
+    assert [t["amount"] for t in account["transactions"]] == list(range(12, 2, -1))
+
+def test_include_transactions_limits_embedding(api_client, account_with_history):
+    """?include_transactions=N embeds the N newest through one limited query"""
+    account_id, headers = account_with_history
+    with capture_request_queries() as requests:
+        response = api_client.get(f"/api/v1/accounts/{account_id}", params={"include_transactions": 2}, headers=headers)
+    assert [t["amount"] for t in response.json()["transactions"]] == [12, 11]
+    history = [s for s in requests[0].statements if "FROM transactions" in s]
+    assert len(history) == 1
+    assert "LIMIT" in history[0]
+
+def test_include_zero_skips_transactions(api_client, account_with_history):
+    """?include_transactions=0 returns the account without touching its history"""
+    account_id, headers = account_with_history
+    with capture_request_queries() as requests:
+        response = api_client.get(f"/api/v1/accounts/{account_id}", params={"include_transactions": 0}, headers=headers)
+    assert response.json()["transactions"] == []
+    assert not any("transactions" in s.split("FROM", 1)[-1] for s in requests[0].statements)
+
+def test_foreign_account_not_found(api_client, account_with_history):
+    account_id, headers = account_with_history
+    assert api_client.get(f"/api/v1/accounts/{account_id + 1}", headers=headers).status_code == 404
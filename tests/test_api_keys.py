@@ -0,0 +1,91 @@
+"""
+Tests for API key authentication
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api_keys import api_key_cache, hash_api_key, key_prefix
+from app.routers import api_keys as api_keys_router
+from app.models import AccountHolder, ApiKey
+from app.password_hashing import password_hash_pool
+from app.query_stats import capture_request_queries
+
+def create_key(api_client, headers, name="nightly-feed"):
+    response = api_client.post("/api/v1/api-keys/", json={"name": name}, headers=headers)
+    assert response.status_code == 201
+    return response.json()
+
+def test_key_stored_as_hmac_digest(isolated_db, api_client, api_user):
+    """Only the prefix and an HMAC digest of the key are stored"""
+    _, headers = api_user
+    created = create_key(api_client, headers)
+    assert key_prefix(created["key"]) == created["prefix"]
+    with Session(isolated_db) as db:
+        stored = db.scalars(select(ApiKey)).one()
+    assert stored.key_hash == hash_api_key(created["key"])
+    assert created["key"] not in (stored.key_hash, stored.prefix)
+    listed = api_client.get("/api/v1/api-keys/", headers=headers).json()
+    assert [k["prefix"] for k in listed] == [created["prefix"]]
+    assert "key" not in listed[0]
+
+def test_api_key_authenticates_without_bcrypt(api_client, api_user):
+    """Reads and writes accept X-API-Key and never touch the hashing pool"""
+    holder_id, headers = api_user
+    key_headers = {"X-API-Key": create_key(api_client, headers)["key"]}
+    submitted = password_hash_pool.stats()["submitted"]
+    response = api_client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "CHECKING"}, headers=key_headers)
+    assert response.status_code == 201
+    assert response.json()["holder_id"] == holder_id
+    assert api_client.get("/api/v1/accounts/", headers=key_headers).status_code == 200
+    assert password_hash_pool.stats()["submitted"] == submitted
+
+def test_cached_key_needs_no_key_query(api_client, api_user):
+    """A recently verified key is checked in memory"""
+    _, headers = api_user
+    key_headers = {"X-API-Key": create_key(api_client, headers)["key"]}
+    api_client.get("/api/v1/accounts/", headers=key_headers)
+    with capture_request_queries() as requests:
+        api_client.get("/api/v1/accounts/", headers=key_headers)
+    assert not any("api_keys" in s for s in requests[0].statements)
+
+def test_wrong_or_revoked_key_rejected(api_client, api_user):
+    """Tampered and revoked keys get 401"""
+    _, headers = api_user
+    created = create_key(api_client, headers)
+    tampered = created["key"][:-2] + ("aa" if not created["key"].endswith("aa") else "bb")
+    assert api_client.get("/api/v1/accounts/", headers={"X-API-Key": tampered}).status_code == 401
+    assert api_client.get("/api/v1/accounts/", headers={"X-API-Key": "garbage"}).status_code == 401
+    assert api_client.delete(f"/api/v1/api-keys/{created['id']}", headers=headers).status_code == 204
+    assert api_client.get("/api/v1/accounts/", headers={"X-API-Key": created["key"]}).status_code == 401
+
+def test_key_recached_before_revocation_commits_is_rejected(api_client, api_user, monkeypatch):
+    """A request that re-caches the key between revocation and commit cannot keep it alive"""
+    _, headers = api_user
+    created = create_key(api_client, headers)
+    key_headers = {"X-API-Key": created["key"]}
+    assert api_client.get("/api/v1/accounts/", headers=key_headers).status_code == 200
+    cached = api_key_cache.get(created["prefix"])
+    revoke = api_keys_router.revoke_api_key
+
+    def revoke_while_another_request_reads(api_key):
+        revoke(api_key)
+        # What a concurrent request sees before the commit: the row still active
+        api_key_cache.set(api_key.prefix, cached)
+
+    monkeypatch.setattr(api_keys_router, "revoke_api_key", revoke_while_another_request_reads)
+    assert api_client.delete(f"/api/v1/api-keys/{created['id']}", headers=headers).status_code == 204
+    assert api_client.get("/api/v1/accounts/", headers=key_headers).status_code == 401
+
+def test_api_key_cannot_create_keys(api_client, api_user):
+    """Minting keys requires a login token"""
+    _, headers = api_user
+    key_headers = {"X-API-Key": create_key(api_client, headers)["key"]}
+    assert api_client.post("/api/v1/api-keys/", json={"name": "x"}, headers=key_headers).status_code == 403
+
+def test_inactive_holder_key_rejected(isolated_db, api_client, api_user):
+    holder_id, headers = api_user
+    key_headers = {"X-API-Key": create_key(api_client, headers)["key"]}
+    with Session(isolated_db) as db:
+        db.get(AccountHolder, holder_id).active = False
+        db.commit()
+    assert api_client.get("/api/v1/accounts/", headers=key_headers).status_code == 400
@@ -0,0 +1,97 @@
+"""
+Tests for hot/cold transaction archiving
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.archive import archive_cutoff, archive_transactions
+from app.models import ArchivedTransaction, Transaction
+from app.query_stats import capture_request_queries
+
+@pytest.fixture
+def archived_account(isolated_db, api_client, api_user):
+    """An account with two old (archived) and two recent transactions"""
+    holder_id, headers = api_user
+    account_id = api_client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "CHECKING"}, headers=headers).json()["id"]
+    for amount in (100, 200, 300):
+        api_client.post(
+            f"/api/v1/transactions/{account_id}",
+            json={"account_id": account_id, "type": "DEPOSIT", "amount": amount},
+            headers=headers,
+        )
+    api_client.post(
+        f"/api/v1/transactions/{account_id}",
+        json={"account_id": account_id, "type": "WITHDRAWAL", "amount": 50},
+        headers=headers,
+    )
+    with isolated_db.begin() as conn:
+        conn.execute(
+            update(Transaction)
+            .where(Transaction.amount.in_([100, 200]))
+            .values(created_at=datetime.utcnow() - timedelta(days=400))
+        )
+    assert archive_transactions(isolated_db, archive_cutoff(365), batch_size=1) == 2
+    return account_id, headers
+
+def archive_reads(stats):
+    """Statements of a request that read archived rows (not just the watermark)"""
+    return [s for s in stats.statements if "transactions_archive.amount" in s]
+
+def test_archiver_moves_old_rows(isolated_db, archived_account):
+    """Old transactions leave the hot table with their ids intact"""
+    with isolated_db.connect() as conn:
+        hot = conn.execute(select(Transaction.amount)).scalars().all()
+        cold = conn.execute(select(ArchivedTransaction.amount)).scalars().all()
+    assert sorted(hot) == [50, 300]
+    assert sorted(cold) == [100, 200]
+    assert archive_transactions(isolated_db, archive_cutoff(365)) == 0
+
+def test_list_transactions_spans_archive(api_client, archived_account):
+    """Listing returns hot and archived transactions, newest first"""
+    account_id, headers = archived_account
+    transactions = api_client.get(f"/api/v1/transactions/{account_id}", headers=headers).json()
+    assert [t["amount"] for t in transactions][-2:] in ([200, 100], [100, 200])
+    assert len(transactions) == 4
+    created = [t["created_at"] for t in transactions]
+    assert created == sorted(created, reverse=True)
+
+def test_recent_statement_skips_archive(api_client, archived_account):
+    """A range newer than the archive never reads archived rows"""
+    account_id, headers = archived_account
+    with capture_request_queries() as requests:
+        statement = api_client.get(f"/api/v1/statements/{account_id}", headers=headers).json()
+    assert sorted(t["amount"] for t in statement["transactions"]) == [50, 300]
+    assert archive_reads(requests[0]) == []
+
+def test_old_statement_reads_archive(api_client, archived_account):
+    """A range reaching back past the cutoff includes archived rows"""
+    account_id, headers = archived_account
+    start = (datetime.utcnow() - timedelta(days=500)).isoformat()
+    with capture_request_queries() as requests:
+        statement = api_client.get(f"/api/v1/statements/{account_id}", params={"start_date": start}, headers=headers).json()
+    assert sorted(t["amount"] for t in statement["transactions"]) == [50, 100, 200, 300]
+    assert statement["total_deposits"] == 600
+    assert len(archive_reads(requests[0])) == 1
+
+def test_summary_counts_include_archive(api_client, archived_account):
+    """Per-type counts cover archived history"""
+    account_id, headers = archived_account
+    summary = api_client.get(f"/api/v1/statements/{account_id}/summary", headers=headers).json()
+    assert summary["total_deposits"] == 3
+    assert summary["total_withdrawals"] == 1
+    assert summary["recent_transactions"] == 4
+
+def test_archiving_everything_never_reuses_ids(isolated_db, api_client, archived_account):
+    """The newest row stays hot, so new transactions never get an archived id"""
+    account_id, headers = archived_account
+    archive_transactions(isolated_db, archive_cutoff(-1))  # everything is "old"
+    deposit = {"account_id": account_id, "type": "DEPOSIT", "amount": 7}
+    new_id = api_client.post(f"/api/v1/transactions/{account_id}", json=deposit, headers=headers).json()["id"]
+    with isolated_db.connect() as conn:
+        assert new_id not in conn.execute(select(ArchivedTransaction.id)).scalars().all()
+
+    assert archive_transactions(isolated_db, archive_cutoff(-1)) == 1
+    ids = [t["id"] for t in api_client.get(f"/api/v1/transactions/{account_id}", headers=headers).json()]
+    assert len(ids) == len(set(ids)) == 5
@@ -0,0 +1,107 @@
+"""
+Tests for atomic balance updates in transactions and transfers
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.balances import change_balance
+from app.models import Account, Transaction
+from app.query_stats import assert_max_queries
+
+@pytest.fixture
+def funded(api_client, api_user):
+    """Two accounts of the fixture user, the first holding 100"""
+    holder_id, headers = api_user
+    accounts = [
+        api_client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": kind}, headers=headers).json()["id"]
+        for kind in ("CHECKING", "SAVINGS")
+    ]
+    api_client.post(
+        f"/api/v1/transactions/{accounts[0]}",
+        json={"account_id": accounts[0], "type": "DEPOSIT", "amount": 100},
+        headers=headers,
+    )
+    return holder_id, accounts, headers
+
+def balances(isolated_db, account_ids):
+    with Session(isolated_db) as db:
+        return [db.get(Account, account_id).balance for account_id in account_ids]
+
+def transaction_count(isolated_db):
+    with Session(isolated_db) as db:
+        return db.scalar(select(func.count(Transaction.id)))
+
+def test_withdrawal_checks_current_balance(isolated_db, funded):
+    """A withdrawal decided on a stale balance cannot overdraw the account"""
+    holder_id, (account_id, _), _ = funded
+    engine = create_async_engine(f"sqlite+aiosqlite:///{isolated_db.url.database}")
+
+    async def scenario():
+        async with AsyncSession(engine) as stale, AsyncSession(engine) as other:
+            assert (await stale.get(Account, account_id)).balance == 100  # both "see" 100
+            assert await change_balance(other, account_id, holder_id, -60)
+            await other.commit()
+            applied = await change_balance(stale, account_id, holder_id, -60)
+            await stale.commit()
+            return applied
+
+    assert asyncio.run(scenario()) is False
+    asyncio.run(engine.dispose())
+    assert balances(isolated_db, [account_id]) == [40]
+
+def test_deposit_is_update_plus_insert(api_client, funded):
+    """The happy path needs no SELECT of the account"""
+    _, (account_id, _), headers = funded
+    with assert_max_queries(3) as requests:
+        response = api_client.post(
+            f"/api/v1/transactions/{account_id}",
+            json={"account_id": account_id, "type": "DEPOSIT", "amount": 5},
+            headers=headers,
+        )
+    assert response.status_code == 201
+    assert not any(s.startswith("SELECT") and "FROM accounts" in s for s in requests[0].statements)
+
+def test_failed_withdrawal_changes_nothing(isolated_db, api_client, funded):
+    """Insufficient funds: 400, balance and history untouched"""
+    _, (account_id, _), headers = funded
+    before = transaction_count(isolated_db)
+    response = api_client.post(
+        f"/api/v1/transactions/{account_id}",
+        json={"account_id": account_id, "type": "WITHDRAWAL", "amount": 100.01},
+        headers=headers,
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Insufficient funds"
+    assert balances(isolated_db, [account_id]) == [100]
+    assert transaction_count(isolated_db) == before
+
+def test_foreign_account_still_404(api_client, funded):
+    _, (account_id, other_id), headers = funded
+    missing = other_id + 1
+    response = api_client.post(
+        f"/api/v1/transactions/{missing}",
+        json={"account_id": missing, "type": "DEPOSIT", "amount": 5},
+        headers=headers,
+    )
+    assert response.status_code == 404
+
+def test_transfer_moves_money_atomically(isolated_db, api_client, funded):
+    """Both balances change, or neither does"""
+    _, (source, target), headers = funded
+    transfer = {"from_account_id": source, "to_account_id": target, "amount": 30}
+    assert api_client.post("/api/v1/transfers/", json=transfer, headers=headers).status_code == 201
+    assert balances(isolated_db, [source, target]) == [70, 30]
+
+    transfer["amount"] = 80
+    response = api_client.post("/api/v1/transfers/", json=transfer, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Insufficient funds for transfer"
+    assert balances(isolated_db, [source, target]) == [70, 30]
+
+    transfer.update(amount=10, to_account_id=target + 1)
+    assert api_client.post("/api/v1/transfers/", json=transfer, headers=headers).status_code == 404
+    assert balances(isolated_db, [source, target]) == [70, 30]
@@ -0,0 +1,87 @@
+"""
+Tests for ETag / If-None-Match on account and card reads
+"""
+import pytest
+
+from app.query_stats import capture_request_queries
+
+@pytest.fixture
+def holder_with_card(api_client, api_user):
+    """A holder with one account and one card"""
+    holder_id, headers = api_user
+    account_id = api_client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "CHECKING"}, headers=headers).json()["id"]
+    card_id = api_client.post(
+        "/api/v1/cards/",
+        json={"account_id": account_id, "holder_id": holder_id, "masked_number": "****-****-****-1234", "brand": "VISA", "last4": "1234"},
+        headers=headers,
+    ).json()["id"]
+    return holder_id, account_id, card_id, headers
+
+def conditional_get(api_client, url, headers, etag):
+    return api_client.get(url, headers={**headers, "If-None-Match": etag})
+
+def deposit(api_client, account_id, headers, amount=10):
+    response = api_client.post(
+        f"/api/v1/transactions/{account_id}",
+        json={"account_id": account_id, "type": "DEPOSIT", "amount": amount},
+        headers=headers,
+    )
+    assert response.status_code == 201
+
+@pytest.mark.parametrize("path", ["/api/v1/accounts/", "/api/v1/accounts/{account_id}", "/api/v1/cards/"])
+def test_unchanged_resource_answers_304_without_loading_rows(api_client, holder_with_card, path):
+    """A matching If-None-Match gets 304 from one version query"""
+    _, account_id, _, headers = holder_with_card
+    url = path.format(account_id=account_id)
+    first = api_client.get(url, headers=headers)
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+    with capture_request_queries() as requests:
+        response = conditional_get(api_client, url, headers, etag)
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    assert len([s for s in requests[0].statements if "account_holders" not in s]) == 1
+
+def test_deposit_changes_account_etags(api_client, holder_with_card):
+    """Balance changes invalidate the account and the account listing"""
+    _, account_id, _, headers = holder_with_card
+    urls = ["/api/v1/accounts/", f"/api/v1/accounts/{account_id}"]
+    etags = [api_client.get(url, headers=headers).headers["etag"] for url in urls]
+    deposit(api_client, account_id, headers)
+    for url, etag in zip(urls, etags):
+        response = conditional_get(api_client, url, headers, etag)
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+    assert conditional_get(api_client, "/api/v1/accounts/", headers, response.headers["etag"]).status_code == 200
+
+def test_card_update_changes_card_etag(api_client, holder_with_card):
+    """Deactivating a card invalidates the card listing"""
+    _, _, card_id, headers = holder_with_card
+    etag = api_client.get("/api/v1/cards/", headers=headers).headers["etag"]
+    assert api_client.patch(f"/api/v1/cards/{card_id}", json={"active": False}, headers=headers).status_code == 200
+    response = conditional_get(api_client, "/api/v1/cards/", headers, etag)
+    assert response.status_code == 200
+    assert response.json()[0]["active"] is False
+
+def test_transfer_changes_both_accounts(api_client, holder_with_card):
+    """A transfer invalidates the source and destination accounts"""
+    holder_id, account_id, _, headers = holder_with_card
+    other_id = api_client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "SAVINGS"}, headers=headers).json()["id"]
+    deposit(api_client, account_id, headers, 100)
+    etags = {a: api_client.get(f"/api/v1/accounts/{a}", headers=headers).headers["etag"] for a in (account_id, other_id)}
+    response = api_client.post(
+        "/api/v1/transfers/",
+        json={"from_account_id": account_id, "to_account_id": other_id, "amount": 25},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    for a, etag in etags.items():
+        assert conditional_get(api_client, f"/api/v1/accounts/{a}", headers, etag).status_code == 200
+
+def test_etag_depends_on_embedded_transactions(api_client, holder_with_card):
+    """Different ?include_transactions representations have different ETags"""
+    _, account_id, _, headers = holder_with_card
+    url = f"/api/v1/accounts/{account_id}"
+    etag = api_client.get(url, headers=headers).headers["etag"]
+    assert api_client.get(url, params={"include_transactions": 0}, headers=headers).headers["etag"] != etag
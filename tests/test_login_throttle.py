@@ -0,0 +1,50 @@
+"""
+Tests for login throttling
+"""
+from app.login_throttle import LoginThrottle, TokenBucketLimiter, login_throttle
+from app.password_hashing import password_hash_pool
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_bucket_allows_burst_then_refills():
+    """BURST attempts pass at once, then one per refill interval"""
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(burst=3, per_minute=6, timer=clock)
+    assert [limiter.acquire("a") for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("a") == 10
+    clock.now = 10
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("b") == 0
+    assert limiter.stats()["rejected"] == 1
+
+def test_bucket_map_is_bounded():
+    """Least recently used buckets are evicted beyond max_keys"""
+    limiter = TokenBucketLimiter(burst=1, per_minute=1, max_keys=2)
+    for key in ["a", "b", "c"]:
+        limiter.acquire(key)
+    assert limiter.stats()["tracked"] == 2
+
+def test_blocked_ip_does_not_drain_email_bucket():
+    """Attempts refused per IP leave the victim's email bucket untouched"""
+    throttle = LoginThrottle(TokenBucketLimiter(2, 1), TokenBucketLimiter(1, 1))
+    assert throttle.check("victim@example.com", "10.0.0.1") == 0
+    assert throttle.check("victim@example.com", "10.0.0.1") > 0
+    assert throttle.check("Victim@Example.com", "10.0.0.2") == 0
+
+def test_login_throttled_before_hashing(api_client, api_user, internal_headers):
+    """Over the email limit the API answers 429 without running bcrypt"""
+    login_throttle.clear()
+    form = {"username": "fixture@example.com", "password": "wrong-password"}
+    for _ in range(login_throttle.email_limiter.burst):
+        assert api_client.post("/api/v1/auth/login", data=form).status_code == 401
+    submitted = password_hash_pool.stats()["submitted"]
+    response = api_client.post("/api/v1/auth/login", data=form)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert password_hash_pool.stats()["submitted"] == submitted
+    assert api_client.get("/internal/login-throttle", headers=internal_headers).json()["email"]["rejected"] == 1
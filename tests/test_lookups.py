@@ -0,0 +1,53 @@
+"""
+Tests for the shared cached lookups
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.engine.default import CACHE_HIT
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.lookups import account_for_holder_stmt, holder_by_email_stmt
+from app.models import Account, AccountHolder, AccountType
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    for email in ("a@example.com", "b@example.com"):
+        holder = AccountHolder(email=email, full_name="Holder", hashed_password="x")
+        session.add(holder)
+        session.flush()
+        session.add(Account(holder_id=holder.id, type=AccountType.CHECKING, balance=0.0))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+def test_lookup_binds_new_values(db):
+    """Each call binds its own parameters despite the shared cached statement"""
+    assert db.execute(holder_by_email_stmt("a@example.com")).scalars().one().email == "a@example.com"
+    assert db.execute(holder_by_email_stmt("b@example.com")).scalars().one().email == "b@example.com"
+    assert db.execute(holder_by_email_stmt("missing@example.com")).scalars().first() is None
+
+def test_lookup_compiled_once(db):
+    """Later calls reuse the compiled statement"""
+    conn = db.connection()
+    conn.execute(account_for_holder_stmt(1, 1)).all()
+    result = conn.execute(account_for_holder_stmt(2, 2))
+    assert result.context.cache_hit is CACHE_HIT
+    assert result.one().id == 2
+
+def test_account_for_other_holder_not_found(db):
+    """An account is only returned to its own holder"""
+    assert db.execute(account_for_holder_stmt(1, 2)).scalars().first() is None
+
+def test_foreign_account_access_denied(api_client, api_user):
+    """Routers reject accounts owned by someone else"""
+    holder_id, headers = api_user
+    account_id = api_client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "SAVINGS"}, headers=headers).json()["id"]
+    assert api_client.get(f"/api/v1/transactions/{account_id}", headers=headers).status_code == 200
+    response = api_client.get(f"/api/v1/transactions/{account_id + 1}", headers=headers)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Account not found or access denied"
@@ -0,0 +1,116 @@
+"""
+Tests for the schema migration runner
+"""
+import importlib
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.dialects import postgresql
+
+from app.db import Base
+from app import models  # registers the model tables on Base.metadata
+from app.migrations import Operations, applied_versions, load_migrations, migrate
+
+initial_schema = importlib.import_module("app.migrations.versions.0001_initial_schema")
+
+def schema_of(engine, exclude=("schema_version",)):
+    """Tables, columns and indexes of a database, for comparison"""
+    inspector = inspect(engine)
+    schema = {}
+    for table in inspector.get_table_names():
+        if table in exclude:
+            continue
+        columns = sorted(c["name"] for c in inspector.get_columns(table))
+        indexes = sorted(
+            (i["name"], tuple(i["column_names"]), bool(i["unique"]))
+            for i in inspector.get_indexes(table)
+        )
+        schema[table] = (columns, indexes)
+    return schema
+
+@pytest.fixture
+def db_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+def test_migrations_match_models(db_engine, tmp_path):
+    """Migrating an empty database yields the same schema as the models"""
+    migrate(db_engine)
+
+    reference = create_engine(f"sqlite:///{tmp_path / 'reference.db'}")
+    Base.metadata.create_all(bind=reference)
+    assert schema_of(db_engine) == schema_of(reference)
+    reference.dispose()
+
+def test_versions_are_recorded_and_rerun_is_noop(db_engine):
+    """Applied versions are stored and a second run does nothing"""
+    migrate(db_engine)
+    assert applied_versions(db_engine) == [m.version for m in load_migrations()]
+    assert migrate(db_engine) == []
+
+def test_upgrades_existing_database_with_data(db_engine):
+    """A database built before migrations keeps its rows and gains the new indexes"""
+    initial_schema.metadata.create_all(bind=db_engine)
+    with db_engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO account_holders (email, full_name, hashed_password) VALUES ('old@example.com', 'Old', 'x')"
+        ))
+
+    migrate(db_engine)
+
+    index_names = {i["name"] for i in inspect(db_engine).get_indexes("transactions")}
+    assert "ix_transactions_account_id_created_at" in index_names
+    with db_engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM account_holders")).scalar() == 1
+
+def test_database_created_by_create_all_is_adopted(db_engine):
+    """Running migrations against a create_all database only records the versions"""
+    Base.metadata.create_all(bind=db_engine)
+    results = migrate(db_engine)
+    assert all(statements == [] for _, statements in results)
+    assert applied_versions(db_engine) == [m.version for m in load_migrations()]
+
+def test_dry_run_changes_nothing(db_engine):
+    """Dry run reports SQL for every pending migration but executes none of it"""
+    results = migrate(db_engine, dry_run=True)
+    assert [m.version for m, _ in results] == [m.version for m in load_migrations()]
+    assert any("CREATE TABLE transactions" in s for _, statements in results for s in statements)
+    assert inspect(db_engine).get_table_names() == []
+
+def test_target_stops_at_version(db_engine):
+    """--target applies migrations only up to the given version"""
+    migrate(db_engine, target=1)
+    assert applied_versions(db_engine) == [1]
+
+def test_postgres_indexes_are_built_concurrently(monkeypatch):
+    """Index creation is online on PostgreSQL"""
+    class FakeConnection:
+        dialect = postgresql.dialect()
+
+    op = Operations(FakeConnection(), dry_run=True)
+    monkeypatch.setattr(op, "has_table", lambda table_name: False)
+    op.create_index("ix_demo", "transactions", ["account_id", "created_at"])
+    assert op.statements == ["CREATE INDEX CONCURRENTLY ix_demo ON transactions (account_id, created_at)"]
+
+def test_postgres_schema_creates_enum_types_first(monkeypatch):
+    """Compiled for PostgreSQL, each enum type is created once, before the first table using it"""
+    class FakeConnection:
+        dialect = postgresql.dialect()
+
+    statements = []
+    created_types = set()
+    for migration in load_migrations():
+        op = Operations(FakeConnection(), dry_run=True, created_types=created_types)
+        monkeypatch.setattr(op, "has_table", lambda table_name: False)
+        monkeypatch.setattr(op.dialect, "has_type", lambda connection, type_name, **kw: False)
+        migration.module.upgrade(op)
+        statements.extend(op.statements)
+
+    def position(prefix):
+        return next(i for i, s in enumerate(statements) if s.startswith(prefix))
+
+    for type_name, table in (("accounttype", "accounts"), ("transactiontype", "transactions")):
+        creates = [s for s in statements if s.startswith(f"CREATE TYPE {type_name} ")]
+        assert len(creates) == 1
+        assert position(f"CREATE TYPE {type_name} ") < position(f"CREATE TABLE {table} ")
+    assert "CREATE TYPE accounttype AS ENUM ('CHECKING', 'SAVINGS')" in statements
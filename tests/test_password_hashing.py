@@ -0,0 +1,103 @@
+"""
+Tests for the bounded password hashing pool
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import app.auth as auth
+from app.models import AccountHolder
+from app.password_hashing import PasswordHashingBusy, PasswordHashPool
+
+def test_jobs_do_not_block_event_loop():
+    """Other coroutines keep running while a slow hash is in progress"""
+    pool = PasswordHashPool(workers=1, max_pending=4)
+
+    async def scenario():
+        slow = asyncio.ensure_future(pool.run(time.sleep, 0.3))
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        responsive_after = time.perf_counter() - started
+        await slow
+        return responsive_after
+
+    assert asyncio.run(scenario()) < 0.2
+    assert pool.stats()["completed"] == 1
+    pool.shutdown()
+
+def test_excess_jobs_rejected():
+    """Jobs beyond max_pending fail fast and are counted"""
+    pool = PasswordHashPool(workers=1, max_pending=2)
+    release = threading.Event()
+
+    async def scenario():
+        blocked = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        stats = pool.stats()
+        with pytest.raises(PasswordHashingBusy):
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*blocked)
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["pending"] == 2
+    assert stats["running"] == 1
+    assert stats["queued"] == 1
+    final = pool.stats()
+    assert final["rejected"] == 1
+    assert final["pending"] == 0
+    assert final["peak_pending"] == 2
+    pool.shutdown()
+
+def test_job_errors_propagate():
+    """Exceptions raised by a job reach the caller and free the slot"""
+    pool = PasswordHashPool(workers=1, max_pending=1)
+
+    def fail():
+        raise ValueError("bad hash")
+
+    with pytest.raises(ValueError):
+        asyncio.run(pool.run(fail))
+    assert pool.stats()["pending"] == 0
+    pool.shutdown()
+
+def test_login_answers_503_when_saturated(api_client, api_user, monkeypatch):
+    """A saturated pool turns logins away instead of queueing them"""
+    monkeypatch.setattr(auth, "password_hash_pool", PasswordHashPool(workers=1, max_pending=0))
+    response = api_client.post("/api/v1/auth/login", data={"username": "fixture@example.com", "password": "fixturepass123"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+def test_hashing_stats_endpoint(api_client, api_user, internal_headers):
+    """Operators can read the hashing pool metrics"""
+    stats = api_client.get("/internal/password-hashing", headers=internal_headers).json()
+    assert stats["completed"] >= 2  # signup hash and login verify
+    assert stats["pending"] == 0
+
+def stored_hash(isolated_db, email):
+    with Session(isolated_db) as db:
+        return db.scalar(select(AccountHolder.hashed_password).where(AccountHolder.email == email))
+
+def test_login_rehashes_outdated_cost(isolated_db, api_client, api_user, monkeypatch):
+    """A successful login upgrades a hash made with a different cost"""
+    monkeypatch.setattr(auth, "pwd_context", auth.make_pwd_context("bcrypt", 5))
+    form = {"username": "fixture@example.com", "password": "fixturepass123"}
+    assert api_client.post("/api/v1/auth/login", data=form).status_code == 200
+    upgraded = stored_hash(isolated_db, "fixture@example.com")
+    assert upgraded.startswith("$2b$05$")
+    assert api_client.post("/api/v1/auth/login", data=form).status_code == 200
+    assert stored_hash(isolated_db, "fixture@example.com") == upgraded
+
+def test_scheme_change_keeps_old_hashes_valid(isolated_db, api_client, api_user, monkeypatch):
+    """After switching scheme, bcrypt hashes still log in and are migrated"""
+    monkeypatch.setattr(auth, "pwd_context", auth.make_pwd_context("pbkdf2_sha256", 1000))
+    form = {"username": "fixture@example.com", "password": "fixturepass123"}
+    assert api_client.post("/api/v1/auth/login", data=form).status_code == 200
+    assert stored_hash(isolated_db, "fixture@example.com").startswith("$pbkdf2-sha256$1000$")
+    form["password"] = "wrong-password"
+    assert api_client.post("/api/v1/auth/login", data=form).status_code == 401
@@ -0,0 +1,104 @@
+"""
+Tests for connection pool configuration and pool statistics
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.main import app
+from app.routers import internal
+from app.pool import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    pool_options,
+    pool_status,
+    register_engine,
+)
+
+def make_engine(tmp_path, **overrides):
+    """Create an instrumented engine on a throwaway SQLite file"""
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    options = pool_options(url)
+    options.update(overrides)
+    engine = create_engine(url, connect_args={"check_same_thread": False}, **options)
+    register_engine("test", engine)
+    return engine
+
+def test_pool_options_for_file_database():
+    """File databases get the instrumented pool and env-driven sizing"""
+    options = pool_options("sqlite:///./banking.db")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert {"pool_size", "max_overflow", "pool_timeout", "pool_recycle", "pool_pre_ping", "pool_use_lifo"} <= options.keys()
+
+    async_options = pool_options("sqlite+aiosqlite:///./banking.db", is_async=True)
+    assert async_options["poolclass"] is InstrumentedAsyncAdaptedQueuePool
+
+def test_pool_options_for_memory_database():
+    """In-memory SQLite keeps SQLAlchemy's single-connection pool"""
+    assert pool_options("sqlite://") == {}
+    assert pool_options("sqlite:///:memory:") == {}
+
+def test_pool_status_tracks_checkouts(tmp_path):
+    """Checked-out, idle and overflow counts follow live connections"""
+    engine = make_engine(tmp_path, pool_size=1, max_overflow=1)
+
+    first = engine.connect()
+    first.execute(text("SELECT 1"))
+    second = engine.connect()
+    status = pool_status(engine)
+    assert status["checked_out"] == 2
+    assert status["overflow"] == 1
+    assert status["checkouts"] == 2
+
+    first.close()
+    second.close()
+    status = pool_status(engine)
+    assert status["checked_out"] == 0
+    assert status["idle"] == 1
+    assert status["checkout_wait_max_ms"] >= 0
+    engine.dispose()
+
+def test_pool_status_records_timeouts(tmp_path):
+    """A checkout that gives up waiting is counted as a timeout"""
+    engine = make_engine(tmp_path, pool_size=1, max_overflow=0, pool_timeout=0.05)
+
+    held = engine.connect()
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    status = pool_status(engine)
+    assert status["checkout_timeouts"] == 1
+    assert status["checkout_wait_max_ms"] >= 50
+    held.close()
+    engine.dispose()
+
+def test_stats_survive_dispose(tmp_path):
+    """engine.dispose() recreates the pool but keeps its counters"""
+    engine = make_engine(tmp_path)
+    with engine.connect():
+        pass
+    engine.dispose()
+    assert pool_status(engine)["checkouts"] == 1
+
+def test_internal_pool_endpoint(internal_headers):
+    """The internal endpoint reports every registered engine"""
+    with TestClient(app) as client:
+        response = client.get("/internal/db/pool", headers=internal_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert "primary" in data
+        assert "primary_async" in data
+        assert "checked_out" in data["primary"]
+
+def test_internal_endpoints_fail_closed(monkeypatch):
+    """Without INTERNAL_API_TOKEN configured, nobody gets the metrics"""
+    monkeypatch.setattr(internal, "INTERNAL_API_TOKEN", None)
+    with TestClient(app) as client:
+        assert client.get("/internal/db/pool").status_code == 403
+        assert client.get("/internal/cache", headers={"X-Internal-Token": ""}).status_code == 403
+
+def test_internal_endpoints_check_token(internal_headers):
+    with TestClient(app) as client:
+        assert client.get("/internal/db/pool").status_code == 403
+        assert client.get("/internal/db/pool", headers={"X-Internal-Token": "wrong"}).status_code == 403
+        assert client.get("/internal/db/pool", headers=internal_headers).status_code == 200
@@ -0,0 +1,95 @@
+"""
+Per-endpoint SQL query budgets (fail on N+1 regressions)
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+import app.query_stats as query_stats
+from app.query_stats import assert_max_queries
+
+@pytest.fixture
+def funded_account(api_client, api_user):
+    """An account with a few transactions and a card"""
+    holder_id, headers = api_user
+    account_id = api_client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "CHECKING"}, headers=headers).json()["id"]
+    for amount in (100, 50, 25):
+        api_client.post(
+            f"/api/v1/transactions/{account_id}",
+            json={"account_id": account_id, "type": "DEPOSIT", "amount": amount},
+            headers=headers,
+        )
+    api_client.post(
+        "/api/v1/cards/",
+        json={"account_id": account_id, "holder_id": holder_id, "masked_number": "****-****-****-1234", "brand": "VISA", "last4": "1234"},
+        headers=headers,
+    )
+    return account_id, headers
+
+@pytest.mark.parametrize("path, budget", [
+    ("/api/v1/account-holders/me", 1),
+    ("/api/v1/accounts/", 2),
+    ("/api/v1/accounts/{account_id}", 3),
+    ("/api/v1/transactions/{account_id}", 4),
+    ("/api/v1/statements/{account_id}", 4),
+    ("/api/v1/statements/{account_id}/summary", 5),
+    ("/api/v1/cards/", 2),
+    ("/api/v1/cards/account/{account_id}", 3),
+])
+def test_read_endpoint_budgets(api_client, funded_account, path, budget):
+    """Read endpoints stay within their statement budget regardless of row count"""
+    account_id, headers = funded_account
+    with assert_max_queries(budget) as requests:
+        response = api_client.get(path.format(account_id=account_id), headers=headers)
+    assert response.status_code == 200
+    assert len(requests) == 1
+
+def test_deposit_budget(api_client, funded_account):
+    """Creating a transaction issues a fixed number of statements"""
+    account_id, headers = funded_account
+    with assert_max_queries(5):
+        response = api_client.post(
+            f"/api/v1/transactions/{account_id}",
+            json={"account_id": account_id, "type": "DEPOSIT", "amount": 10},
+            headers=headers,
+        )
+    assert response.status_code == 201
+
+def test_budget_violation_is_reported(api_client, funded_account):
+    """Exceeding the budget fails with the offending statements listed"""
+    account_id, headers = funded_account
+    with pytest.raises(AssertionError, match="Query budget of 1 exceeded"):
+        with assert_max_queries(1):
+            api_client.get(f"/api/v1/statements/{account_id}/summary", headers=headers)
+
+def test_query_stats_headers(api_client, funded_account, monkeypatch):
+    """Responses carry the statement count and DB time when enabled"""
+    monkeypatch.setattr(query_stats, "QUERY_STATS_HEADERS", True)
+    account_id, headers = funded_account
+    response = api_client.get("/api/v1/accounts/", headers=headers)
+    assert int(response.headers["x-db-query-count"]) >= 1
+    assert float(response.headers["x-db-time-ms"]) >= 0
+
+def test_request_stats_carry_route_template(api_client, funded_account):
+    """Stats name the route template rather than the concrete path"""
+    account_id, headers = funded_account
+    with assert_max_queries(10) as requests:
+        api_client.get(f"/api/v1/accounts/{account_id}", headers=headers)
+    assert requests[0].route == "/api/v1/accounts/{account_id}"
+
+def test_failed_statements_leave_no_timer_state(tmp_path):
+    """Statements that raise (no after_cursor_execute) keep nothing on the pooled connection"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'timers.db'}")
+    stats = query_stats.QueryStats()
+    token = query_stats.current_query_stats.set(stats)
+    try:
+        with engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+            assert not any("start_time" in key for key in conn.connection.info)
+    finally:
+        query_stats.current_query_stats.reset(token)
+        engine.dispose()
+    assert stats.count == 1
@@ -0,0 +1,90 @@
+"""
+Query plan tests for the hot query shapes
+"""
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, func, select
+
+from app.archive import _history_query
+from app.db import Base
+from app.models import Account, Card, Transaction, TransactionType
+
+@pytest.fixture(scope="module")
+def plan_engine():
+    """In-memory database with the full schema and indexes"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+def query_plan(engine, statement) -> str:
+    """Return SQLite's EXPLAIN QUERY PLAN output for a statement as one string"""
+    compiled = statement.compile(engine)
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", tuple(compiled.params.values())).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+def test_transaction_history_uses_index_without_sort(plan_engine):
+    """list_transactions: range scan on (account_id, created_at), no temp B-tree sort"""
+    plan = query_plan(
+        plan_engine,
+        select(Transaction)
+        .where(Transaction.account_id == 1)
+        .order_by(Transaction.created_at.desc())
+    )
+    assert "ix_transactions_account_id_created_at" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_statement_date_range_uses_index(plan_engine):
+    """get_account_statement: the date range is part of the index search"""
+    plan = query_plan(
+        plan_engine,
+        select(Transaction)
+        .where(
+            Transaction.account_id == 1,
+            Transaction.created_at >= datetime(2024, 1, 1),
+            Transaction.created_at <= datetime(2024, 2, 1),
+        )
+        .order_by(Transaction.created_at.desc())
+    )
+    assert "ix_transactions_account_id_created_at (account_id=? AND created_at>? AND created_at<?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_transaction_page_seeks_to_cursor(plan_engine):
+    """list_transactions with a cursor: index range from the cursor, no sort"""
+    plan = query_plan(plan_engine, _history_query(Transaction, 1, None, None, 101, before=(datetime(2024, 1, 1), 42)))
+    assert "ix_transactions_account_id_created_at (account_id=? AND created_at<?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_type_filtered_page_uses_type_index(plan_engine):
+    """list_transactions?type=...: the type is part of the index search"""
+    plan = query_plan(
+        plan_engine,
+        _history_query(Transaction, 1, None, None, 101, before=(datetime(2024, 1, 1), 42), transaction_type=TransactionType.DEPOSIT),
+    )
+    assert "ix_transactions_account_id_type_created_at (account_id=? AND type=? AND created_at<?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_summary_counts_use_covering_index(plan_engine):
+    """get_account_summary: counts by type never touch the table"""
+    plan = query_plan(
+        plan_engine,
+        select(func.count(Transaction.id)).where(
+            Transaction.account_id == 1,
+            Transaction.type == TransactionType.DEPOSIT,
+        )
+    )
+    assert "COVERING INDEX ix_transactions_account_id_type" in plan
+
+def test_account_listing_uses_holder_index(plan_engine):
+    """list_accounts filters through the holder index"""
+    plan = query_plan(plan_engine, select(Account).where(Account.holder_id == 1))
+    assert "ix_accounts_holder_id_id" in plan
+
+def test_card_listing_uses_holder_account_index(plan_engine):
+    """list_account_cards searches on both holder and account"""
+    plan = query_plan(
+        plan_engine,
+        select(Card).where(Card.holder_id == 1, Card.account_id == 2)
+    )
+    assert "ix_cards_holder_id_account_id (holder_id=? AND account_id=?)" in plan
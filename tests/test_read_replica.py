@@ -0,0 +1,110 @@
+"""
+Tests for read-replica routing with read-your-writes protection
+"""
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import app.db as db_module
+from app.main import app
+from app.db import Base, get_async_db, get_read_db
+
+@pytest.fixture
+def replica_setup(tmp_path, monkeypatch):
+    """Route the real dependencies to a primary file and a separate (empty) replica file"""
+    sessionmakers = {}
+    for name in ("primary", "replica"):
+        path = tmp_path / f"{name}.db"
+        sync_engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=sync_engine)
+        sync_engine.dispose()
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+        sessionmakers[name] = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    monkeypatch.setattr(db_module, "AsyncSessionLocal", sessionmakers["primary"])
+    monkeypatch.setattr(db_module, "AsyncReadSessionLocal", sessionmakers["replica"])
+    monkeypatch.delitem(app.dependency_overrides, get_async_db, raising=False)
+    monkeypatch.delitem(app.dependency_overrides, get_read_db, raising=False)
+    db_module._primary_until.clear()
+    yield
+    db_module._primary_until.clear()
+
+def signup_and_login(client):
+    user = {"email": "replica@example.com", "full_name": "Replica User", "password": "replicapass123"}
+    assert client.post("/api/v1/auth/signup", json=user).status_code == 201
+    response = client.post("/api/v1/auth/login", data={"username": user["email"], "password": user["password"]})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_reads_stick_to_primary_after_write(replica_setup):
+    """A client sees its own write immediately even though the replica lags"""
+    with TestClient(app) as client:
+        headers = signup_and_login(client)
+        holder_id = client.get("/api/v1/account-holders/me", headers=headers).json()["id"]
+        response = client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "CHECKING"}, headers=headers)
+        assert response.status_code == 201
+
+        accounts = client.get("/api/v1/accounts/", headers=headers).json()
+        assert len(accounts) == 1
+
+def test_reads_use_replica_outside_window(replica_setup, monkeypatch):
+    """Once the window has passed, reads are served by the replica"""
+    with TestClient(app) as client:
+        headers = signup_and_login(client)
+        holder_id = client.get("/api/v1/account-holders/me", headers=headers).json()["id"]
+        client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "CHECKING"}, headers=headers)
+
+        db_module._primary_until.clear()
+        client.cookies.clear()
+        # The replica stand-in never received the account
+        assert client.get("/api/v1/accounts/", headers=headers).json() == []
+
+def test_window_reaches_other_workers(replica_setup):
+    """The signed cookie keeps reads on the primary on a worker that never saw the write"""
+    with TestClient(app) as client:
+        headers = signup_and_login(client)
+        holder_id = client.get("/api/v1/account-holders/me", headers=headers).json()["id"]
+        response = client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "CHECKING"}, headers=headers)
+        assert db_module.READ_YOUR_WRITES_COOKIE in response.cookies
+
+        db_module._primary_until.clear()  # as seen by another worker process
+        assert len(client.get("/api/v1/accounts/", headers=headers).json()) == 1
+
+def test_forged_window_cookie_is_ignored(replica_setup):
+    with TestClient(app) as client:
+        headers = signup_and_login(client)
+        holder_id = client.get("/api/v1/account-holders/me", headers=headers).json()["id"]
+        client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "CHECKING"}, headers=headers)
+
+        db_module._primary_until.clear()
+        client.cookies.clear()
+        client.cookies.set(db_module.READ_YOUR_WRITES_COOKIE, "9999999999.forged")
+        assert client.get("/api/v1/accounts/", headers=headers).json() == []
+
+def test_api_key_clients_get_their_own_window():
+    """Clients authenticating with X-API-Key are not lumped together by address"""
+    def key_of(headers):
+        return db_module.client_key(Request({"type": "http", "headers": headers, "client": ("10.0.0.1", 1234)}))
+
+    first = key_of([(b"x-api-key", b"bk_one_secret")])
+    assert first != key_of([(b"x-api-key", b"bk_two_secret")])
+    assert first != key_of([])
+
+def test_write_window_is_per_client(replica_setup):
+    """Another client's write does not pin this client's reads to the primary"""
+    db_module.mark_recent_write("someone-else")
+    assert db_module.wrote_recently("someone-else")
+    assert not db_module.wrote_recently("this-client")
+
+def test_expired_windows_are_pruned():
+    """Expired entries are dropped as new writes arrive"""
+    db_module._primary_until.clear()
+    db_module.mark_recent_write("a")
+    db_module._primary_until["a"] = 0.0  # window already over
+    db_module.mark_recent_write("b")
+    assert not db_module.wrote_recently("a")
+    assert list(db_module._primary_until) == ["b"]
+    db_module._primary_until.clear()
@@ -0,0 +1,69 @@
+"""
+Tests for refresh tokens and rotation
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import AccountHolder, RefreshToken
+from app.password_hashing import password_hash_pool
+
+def login(api_client):
+    response = api_client.post("/api/v1/auth/login", data={"username": "fixture@example.com", "password": "fixturepass123"})
+    return response.json()
+
+def refresh(api_client, refresh_token):
+    return api_client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+
+def test_login_returns_refresh_token(isolated_db, api_client, api_user):
+    """Login hands out a refresh token, stored only as a hash"""
+    tokens = login(api_client)
+    assert tokens["refresh_token"]
+    assert tokens["refresh_expires_in"] > tokens["expires_in"]
+    with Session(isolated_db) as db:
+        stored = db.scalars(select(RefreshToken.token_hash)).all()
+    assert tokens["refresh_token"] not in stored
+
+def test_refresh_skips_password_hashing(api_client, api_user):
+    """Refreshing issues a working access token without any bcrypt job"""
+    tokens = login(api_client)
+    submitted = password_hash_pool.stats()["submitted"]
+    response = refresh(api_client, tokens["refresh_token"])
+    assert response.status_code == 200
+    assert password_hash_pool.stats()["submitted"] == submitted
+    new_tokens = response.json()
+    headers = {"Authorization": f"Bearer {new_tokens['access_token']}"}
+    assert api_client.get("/api/v1/account-holders/me", headers=headers).status_code == 200
+
+def test_rotation_invalidates_previous_token(api_client, api_user):
+    """Each refresh token works once; its replacement works next"""
+    first = login(api_client)["refresh_token"]
+    second = refresh(api_client, first).json()["refresh_token"]
+    assert second != first
+    assert refresh(api_client, first).status_code == 401
+
+def test_reuse_revokes_token_family(api_client, api_user):
+    """Replaying a rotated token also kills the tokens rotated from it"""
+    first = login(api_client)["refresh_token"]
+    second = refresh(api_client, first).json()["refresh_token"]
+    assert refresh(api_client, first).status_code == 401
+    assert refresh(api_client, second).status_code == 401
+
+def test_inactive_holder_cannot_refresh(isolated_db, api_client, api_user):
+    """Deactivated holders get no new tokens"""
+    holder_id, _ = api_user
+    refresh_token = login(api_client)["refresh_token"]
+    with Session(isolated_db) as db:
+        db.get(AccountHolder, holder_id).active = False
+        db.commit()
+    assert refresh(api_client, refresh_token).status_code == 401
+
+def test_logout_revokes_refresh_token(api_client, api_user):
+    """Logging out with the refresh token ends the whole session"""
+    tokens = login(api_client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    response = api_client.post("/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers)
+    assert response.status_code == 204
+    assert refresh(api_client, tokens["refresh_token"]).status_code == 401
+
+def test_unknown_refresh_token_rejected(api_client, api_user):
+    assert refresh(api_client, "not-a-token").status_code == 401
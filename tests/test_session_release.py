@@ -0,0 +1,84 @@
+"""
+Tests for releasing database connections before response serialization
+"""
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, model_validator
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import app.db as db_module
+from app.db import ReleaseSessionsRoute, get_async_db
+
+# Connections currently checked out, and the count seen during serialization
+pool_usage = {"checked_out": 0, "during_serialization": []}
+
+class Answer(BaseModel):
+    value: int
+
+    @model_validator(mode="before")
+    @classmethod
+    def record_pool_usage(cls, data):
+        pool_usage["during_serialization"].append(pool_usage["checked_out"])
+        return data
+
+@pytest.fixture(autouse=True)
+def counted_sessions(tmp_path, monkeypatch):
+    """Route get_async_db to a database whose connection checkouts are counted"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'release.db'}", poolclass=NullPool)
+    pool_usage.update(checked_out=0, during_serialization=[])
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def on_checkout(*args):
+        pool_usage["checked_out"] += 1
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def on_checkin(*args):
+        pool_usage["checked_out"] -= 1
+
+    monkeypatch.setattr(db_module, "AsyncSessionLocal", async_sessionmaker(bind=engine, expire_on_commit=False))
+
+def make_client(route_class) -> TestClient:
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/answer", response_model=Answer)
+    async def answer(db=Depends(get_async_db)):
+        return {"value": await db.scalar(text("SELECT 42"))}
+
+    @router.get("/boom")
+    async def boom(db=Depends(get_async_db)):
+        await db.execute(text("SELECT 1"))
+        raise RuntimeError("boom")
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app, raise_server_exceptions=False)
+
+def test_connection_released_before_serialization():
+    """The endpoint's connection is back in the pool while the response is serialized"""
+    with make_client(ReleaseSessionsRoute) as client:
+        assert client.get("/answer").json() == {"value": 42}
+    assert pool_usage["during_serialization"] == [0]
+
+def test_default_route_holds_connection():
+    """Without the route class the connection is held until dependency teardown"""
+    with make_client(APIRoute) as client:
+        assert client.get("/answer").json() == {"value": 42}
+    assert pool_usage["during_serialization"] == [1]
+    assert pool_usage["checked_out"] == 0
+
+def test_sessions_released_when_endpoint_fails():
+    """Errors raised by the endpoint still release the connection"""
+    with make_client(ReleaseSessionsRoute) as client:
+        assert client.get("/boom").status_code == 500
+    assert pool_usage["checked_out"] == 0
+
+def test_endpoint_metadata_preserved():
+    """Wrapping keeps the endpoint's name and signature for OpenAPI"""
+    route = next(r for r in make_client(ReleaseSessionsRoute).app.routes if r.path == "/answer")
+    assert route.name == "answer"
+    assert route.response_model is Answer
+    assert route.dependant.dependencies[0].call is get_async_db
@@ -0,0 +1,122 @@
+"""
+Tests for the slow query log
+"""
+import asyncio
+import logging
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.query_stats import QueryStats, current_query_stats
+from app.slow_query_log import explain, install_slow_query_log, parameter_shape
+
+def make_engine(tmp_path, **options):
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, owner_id INTEGER, name VARCHAR)"))
+        conn.execute(text("CREATE INDEX ix_items_owner_id ON items (owner_id)"))
+    install_slow_query_log(engine, **options)
+    return engine
+
+def slow_records(caplog):
+    return [r for r in caplog.records if r.name == "app.slow_query"]
+
+def test_parameter_shape_hides_values():
+    """Only parameter types are logged"""
+    assert parameter_shape((1, "secret@example.com")) == "(int, str)"
+    assert parameter_shape({"owner_id": 7}) == "{owner_id: int}"
+    assert parameter_shape(None) == "()"
+
+def test_slow_select_logged_with_plan(tmp_path, caplog):
+    """A statement over the threshold is logged with its shape, route and plan"""
+    engine = make_engine(tmp_path, threshold_ms=0)
+    stats = QueryStats("GET", "/api/v1/statements/1")
+    token = current_query_stats.set(stats)
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT * FROM items WHERE owner_id = :owner_id"), {"owner_id": 42}).all()
+    finally:
+        current_query_stats.reset(token)
+
+    record = slow_records(caplog)[-1]
+    assert record.route == "GET /api/v1/statements/1"
+    assert record.parameter_shape == "(int)"
+    assert "42" not in record.getMessage()
+    assert any("ix_items_owner_id" in line for line in record.plan)
+
+def test_fast_statements_not_logged(tmp_path, caplog):
+    """Statements under the threshold leave no trace"""
+    engine = make_engine(tmp_path, threshold_ms=10_000)
+    with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT * FROM items")).all()
+    assert slow_records(caplog) == []
+
+def test_writes_logged_without_plan(tmp_path, caplog):
+    """Only SELECT statements are explained"""
+    engine = make_engine(tmp_path, threshold_ms=0)
+    with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO items (owner_id, name) VALUES (:owner_id, :name)"), {"owner_id": 1, "name": "a"})
+    record = slow_records(caplog)[-1]
+    assert record.route == "<no request>"
+    assert record.plan is None
+
+def test_async_engine_plan_capture(tmp_path, caplog):
+    """EXPLAIN also works through the aiosqlite driver"""
+    make_engine(tmp_path, threshold_ms=-1)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'slow.db'}", poolclass=NullPool)
+    install_slow_query_log(async_engine.sync_engine, threshold_ms=0)
+
+    async def run():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT name FROM items WHERE owner_id = :owner_id"), {"owner_id": 1})
+        await async_engine.dispose()
+
+    with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+        asyncio.run(run())
+    record = slow_records(caplog)[-1]
+    assert any("ix_items_owner_id" in line for line in record.plan)
+
+def test_failed_explain_is_rolled_back_to_savepoint():
+    """On PostgreSQL a failing EXPLAIN cannot leave the caller's transaction aborted"""
+    executed = []
+
+    class FailingCursor:
+        def execute(self, sql, parameters=None):
+            executed.append(sql)
+            if sql.startswith("EXPLAIN"):
+                raise RuntimeError("canceling statement due to statement timeout")
+
+        def close(self):
+            pass
+
+    class FakeConnection:
+        class dialect:
+            name = "postgresql"
+
+        class connection:
+            class dbapi_connection:
+                cursor = FailingCursor
+
+    plan = explain(FakeConnection(), "SELECT * FROM items WHERE owner_id = %(owner_id)s", {"owner_id": 1})
+    assert plan[0].startswith("<EXPLAIN failed")
+    assert executed == [
+        "SAVEPOINT slow_query_explain",
+        "EXPLAIN SELECT * FROM items WHERE owner_id = %(owner_id)s",
+        "ROLLBACK TO SAVEPOINT slow_query_explain",
+    ]
+
+def test_failed_statements_leave_no_timer_state(tmp_path):
+    """Statements that raise keep nothing on the pooled connection"""
+    engine = make_engine(tmp_path, threshold_ms=0)
+    with engine.connect() as conn:
+        for _ in range(3):
+            try:
+                conn.execute(text("SELECT * FROM missing_table"))
+            except Exception:
+                conn.rollback()
+        assert not any("start_time" in key for key in conn.connection.info)
+    engine.dispose()
@@ -0,0 +1,48 @@
+"""
+Tests for the SQLite tuning profiles
+"""
+import asyncio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.sqlite_profile import apply_sqlite_profile, current_pragmas, profile_pragmas
+
+def test_performance_profile_pragmas(tmp_path):
+    """The performance profile switches to WAL and the tuned pragmas"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'perf.db'}")
+    apply_sqlite_profile(engine, "performance")
+    with engine.connect() as conn:
+        pragmas = current_pragmas(conn)
+    assert pragmas["journal_mode"] == "wal"
+    assert pragmas["synchronous"] == 1  # NORMAL
+    assert pragmas["busy_timeout"] > 0
+    assert pragmas["cache_size"] < 0
+    assert pragmas["mmap_size"] > 0
+    assert pragmas["temp_store"] == 2  # MEMORY
+    engine.dispose()
+
+def test_default_profile_leaves_sqlite_defaults(tmp_path):
+    """The default profile does not touch the connection"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'default.db'}")
+    apply_sqlite_profile(engine, "default")
+    with engine.connect() as conn:
+        assert current_pragmas(conn)["journal_mode"] == "delete"
+    engine.dispose()
+
+async def _async_journal_mode(url):
+    engine = create_async_engine(url)
+    apply_sqlite_profile(engine.sync_engine, "performance")
+    async with engine.connect() as conn:
+        mode = await conn.run_sync(lambda sync_conn: current_pragmas(sync_conn)["journal_mode"])
+    await engine.dispose()
+    return mode
+
+def test_performance_profile_on_async_engine(tmp_path):
+    """The hook also runs for aiosqlite connections"""
+    assert asyncio.run(_async_journal_mode(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")) == "wal"
+
+def test_unknown_profile_is_rejected():
+    """A typo in SQLITE_PROFILE fails loudly instead of silently running untuned"""
+    with pytest.raises(ValueError):
+        profile_pragmas("fast")
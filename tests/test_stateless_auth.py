@@ -0,0 +1,78 @@
+"""
+Tests for the opt-in stateless auth mode (identity claims in the JWT)
+"""
+import time
+
+import pytest
+from sqlalchemy.orm import Session
+
+import app.auth as auth
+from app.auth import verify_token
+from app.models import AccountHolder
+from app.query_stats import capture_request_queries
+from app.user_cache import user_cache
+
+@pytest.fixture
+def stateless_user(api_client, api_user, monkeypatch):
+    """Log in again with stateless tokens enabled; returns (holder_id, headers, login body)"""
+    monkeypatch.setattr(auth, "STATELESS_AUTH", True)
+    holder_id, _ = api_user
+    response = api_client.post("/api/v1/auth/login", data={"username": "fixture@example.com", "password": "fixturepass123"})
+    body = response.json()
+    return holder_id, {"Authorization": f"Bearer {body['access_token']}"}, body
+
+def test_token_carries_identity_claims(stateless_user):
+    """Stateless tokens embed holder_id, role and active and are short-lived"""
+    holder_id, _, body = stateless_user
+    claims = verify_token(body["access_token"])
+    assert claims["holder_id"] == holder_id
+    assert claims["role"] == "customer"
+    assert claims["active"] is True
+    assert body["expires_in"] == auth.STATELESS_TOKEN_EXPIRE_MINUTES * 60
+
+def test_read_routes_skip_holder_lookup(api_client, stateless_user):
+    """Read-only routes authorize from the claims without loading the holder"""
+    holder_id, headers, _ = stateless_user
+    account_id = api_client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "CHECKING"}, headers=headers).json()["id"]
+    user_cache.clear()
+
+    with capture_request_queries() as requests:
+        assert api_client.get("/api/v1/accounts/", headers=headers).status_code == 200
+        assert api_client.get(f"/api/v1/transactions/{account_id}", headers=headers).status_code == 200
+        assert api_client.get(f"/api/v1/statements/{account_id}", headers=headers).status_code == 200
+        assert api_client.get("/api/v1/cards/", headers=headers).status_code == 200
+    for stats in requests:
+        assert not any("FROM account_holders" in s for s in stats.statements), stats.route
+
+def test_foreign_accounts_still_denied(api_client, stateless_user):
+    """Ownership checks use the holder_id claim"""
+    _, headers, _ = stateless_user
+    assert api_client.get("/api/v1/accounts/999", headers=headers).status_code == 404
+
+def test_profile_still_loaded_from_database(api_client, stateless_user):
+    """Routes needing the full profile keep loading the holder"""
+    _, headers, _ = stateless_user
+    assert api_client.get("/api/v1/account-holders/me", headers=headers).json()["full_name"] == "Fixture User"
+
+def test_deactivation_revokes_stateless_tokens(isolated_db, api_client, stateless_user):
+    """Tokens issued before a holder is deactivated stop working"""
+    holder_id, headers, _ = stateless_user
+    with Session(isolated_db) as db:
+        db.get(AccountHolder, holder_id).active = False
+        db.commit()
+    assert api_client.get("/api/v1/accounts/", headers=headers).status_code == 401
+
+def test_unrelated_update_keeps_tokens(isolated_db, api_client, stateless_user):
+    """Changes that do not affect the claims leave tokens valid"""
+    holder_id, headers, _ = stateless_user
+    with Session(isolated_db) as db:
+        db.get(AccountHolder, holder_id).full_name = "Renamed"
+        db.commit()
+    assert api_client.get("/api/v1/accounts/", headers=headers).status_code == 200
+
+def test_inactive_claim_rejected(api_client, stateless_user):
+    """A token minted for an inactive holder is refused"""
+    holder_id, _, _ = stateless_user
+    token = auth.create_access_token({"sub": "fixture@example.com", "holder_id": holder_id, "role": "customer", "active": False, "iat": time.time()})
+    response = api_client.get("/api/v1/accounts/", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 400
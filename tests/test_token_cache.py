@@ -0,0 +1,57 @@
+"""
+Tests for the verified-token cache in verify_token
+"""
+from datetime import timedelta
+import time
+
+import pytest
+
+import app.auth as auth
+from app.auth import create_access_token, verify_token
+from app.cache import TTLCache
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    """Fresh token cache plus a counter of real jwt.decode calls"""
+    monkeypatch.setattr(auth, "token_cache", TTLCache(16, ttl=60))
+    calls = []
+    real_decode = auth.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    return calls
+
+def test_reused_token_verified_once(decode_calls):
+    """Repeated verification of the same token skips jwt.decode"""
+    token = create_access_token({"sub": "cache@example.com"})
+    assert verify_token(token)["sub"] == "cache@example.com"
+    assert verify_token(token)["sub"] == "cache@example.com"
+    assert len(decode_calls) == 1
+
+def test_cached_payload_is_a_copy(decode_calls):
+    """Callers cannot corrupt the cached payload"""
+    token = create_access_token({"sub": "cache@example.com"})
+    verify_token(token)["sub"] = "someone-else@example.com"
+    assert verify_token(token)["sub"] == "cache@example.com"
+
+def test_expired_token_not_served_from_cache(decode_calls, monkeypatch):
+    """Once exp has passed the token is verified in full again (and rejected)"""
+    token = create_access_token({"sub": "cache@example.com"}, expires_delta=timedelta(minutes=1))
+    assert verify_token(token) is not None
+    later = time.time() + 120
+    monkeypatch.setattr(auth.time, "time", lambda: later)
+    verify_token(token)
+    assert len(decode_calls) == 2
+    assert len(auth.token_cache) == 0
+
+def test_invalid_tokens_not_cached(decode_calls):
+    """Tampered tokens fail every time"""
+    token = create_access_token({"sub": "cache@example.com"})
+    tampered = token[:-2] + ("AA" if not token.endswith("AA") else "BB")
+    assert verify_token(tampered) is None
+    assert verify_token(tampered) is None
+    assert len(decode_calls) == 2
+    assert len(auth.token_cache) == 0
@@ -0,0 +1,124 @@
+"""
+Tests for logout / token revocation
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import token_revocation
+from app.query_stats import capture_request_queries
+from app.token_revocation import BloomFilter, RevocationList, token_digest
+
+def login(api_client):
+    response = api_client.post("/api/v1/auth/login", data={"username": "fixture@example.com", "password": "fixturepass123"})
+    return response.json()["access_token"]
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+def test_bloom_filter_has_no_false_negatives():
+    """Every added digest is reported present; unrelated digests rarely are"""
+    bloom = BloomFilter(capacity=1000)
+    added = [os.urandom(32) for _ in range(1000)]
+    for digest in added:
+        bloom.add(digest)
+    assert all(digest in bloom for digest in added)
+    false_positives = sum(os.urandom(32) in bloom for _ in range(10000))
+    assert false_positives < 300  # configured for ~1%
+
+def test_revocation_entries_expire():
+    """Entries stop matching at the token's exp and are purged"""
+    revoked = RevocationList(capacity=10)
+    live, expired = token_digest("live"), token_digest("expired")
+    revoked.add(live, time.time() + 60)
+    revoked.add(expired, time.time() - 1)
+    assert live in revoked
+    assert expired not in revoked
+    revoked.purge_expired()
+    assert revoked.stats()["revoked"] == 1
+
+def test_logout_revokes_only_that_token(api_client, api_user):
+    """After logout the token is rejected; other sessions keep working"""
+    _, headers = api_user
+    other = login(api_client)
+    assert api_client.post("/api/v1/auth/logout", headers=headers).status_code == 204
+    assert api_client.get("/api/v1/accounts/", headers=headers).status_code == 401
+    assert api_client.get("/api/v1/account-holders/me", headers=headers).status_code == 401
+    assert api_client.get("/api/v1/accounts/", headers=bearer(other)).status_code == 200
+
+def test_revocation_survives_restart(api_client, api_user):
+    """Revocations are persisted and reloaded into an empty list"""
+    _, headers = api_user
+    api_client.post("/api/v1/auth/logout", headers=headers)
+    token_revocation.clear()  # what a fresh process starts with
+    assert api_client.get("/api/v1/accounts/", headers=headers).status_code == 401
+
+def test_revoke_another_session(api_client, api_user):
+    """A user can revoke one of their other tokens"""
+    _, headers = api_user
+    other = login(api_client)
+    assert api_client.post("/api/v1/auth/revoke", json={"token": other}, headers=headers).status_code == 204
+    assert api_client.get("/api/v1/accounts/", headers=bearer(other)).status_code == 401
+    assert api_client.get("/api/v1/accounts/", headers=headers).status_code == 200
+
+def test_cannot_revoke_foreign_token(api_client, api_user):
+    """Tokens of other holders cannot be revoked"""
+    _, headers = api_user
+    intruder = {"email": "intruder@example.com", "full_name": "Intruder", "password": "intruderpass123"}
+    api_client.post("/api/v1/auth/signup", json=intruder)
+    intruder_token = api_client.post(
+        "/api/v1/auth/login", data={"username": intruder["email"], "password": intruder["password"]}
+    ).json()["access_token"]
+    response = api_client.post("/api/v1/auth/revoke", json={"token": intruder_token}, headers=headers)
+    assert response.status_code == 403
+    assert api_client.get("/api/v1/accounts/", headers=bearer(intruder_token)).status_code == 200
+
+def test_revocation_check_needs_no_query(api_client, api_user):
+    """Between syncs, authenticating a request runs no revocation query"""
+    _, headers = api_user
+    with capture_request_queries() as requests:
+        api_client.get("/api/v1/account-holders/me", headers=headers)
+    assert not any("revoked_tokens" in s for s in requests[0].statements)
+
+def test_sync_picks_up_revocations_from_the_same_second(isolated_db):
+    """Another process sees a revocation stamped in the same second as the last one it synced"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{isolated_db.url.database}")
+    other_process = RevocationList(capacity=10)
+    # Server-default timestamps are stored by SQLite as whole seconds
+    second = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+    async def revoke(db, token):
+        digest = token_digest(token)
+        await token_revocation.revoke_token(db, digest, time.time() + 60)
+        await db.execute(
+            text("UPDATE revoked_tokens SET revoked_at = :second WHERE token_digest = :digest"),
+            {"second": second, "digest": digest.hex()},
+        )
+        await db.commit()
+
+    async def scenario():
+        async with AsyncSession(engine) as db:
+            await revoke(db, "first")
+            await other_process.sync(db, force=True)
+            await revoke(db, "second")
+            await other_process.sync(db, force=True)
+
+    asyncio.run(scenario())
+    asyncio.run(engine.dispose())
+    assert token_digest("first") in other_process
+    assert token_digest("second") in other_process
+    assert other_process.stats()["revoked"] == 2
+
+def test_old_claim_changes_are_pruned():
+    """Claim changes older than a stateless token's lifetime are forgotten"""
+    token_revocation.clear()
+    token_revocation.revoke_holder_tokens(1)
+    token_revocation._claims_changed_at[1] = 0.0  # changed long ago
+    token_revocation.revoke_holder_tokens(2)
+    assert list(token_revocation._claims_changed_at) == [2]
+    assert token_revocation.holder_tokens_revoked(2, time.time() - 1)
+    token_revocation.clear()
@@ -0,0 +1,102 @@
+"""
+Tests for batch transaction ingestion
+"""
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.balances import TRANSACTION_BATCH_MAX_ITEMS
+from app.models import Account, Transaction
+from app.query_stats import capture_request_queries
+
+@pytest.fixture
+def account(api_client, api_user):
+    """A CHECKING account of the fixture user, empty"""
+    holder_id, headers = api_user
+    response = api_client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "CHECKING"}, headers=headers)
+    return response.json()["id"], headers
+
+def item(account_id, kind, amount, description=None):
+    return {"account_id": account_id, "type": kind, "amount": amount, "description": description}
+
+def stored(isolated_db, account_id):
+    """Balance and number of transactions of an account"""
+    with Session(isolated_db) as db:
+        balance = db.get(Account, account_id).balance
+        count = db.scalar(select(func.count(Transaction.id)).where(Transaction.account_id == account_id))
+        return balance, count
+
+def test_batch_applies_items_in_order(isolated_db, api_client, account):
+    account_id, headers = account
+    items = [item(account_id, "DEPOSIT", 10, f"feed {i}") for i in range(20)] + [item(account_id, "WITHDRAWAL", 50)]
+    response = api_client.post(f"/api/v1/transactions/{account_id}/batch", json=items, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["rejected"], body["balance"]) == (21, 0, 150)
+    assert [r["index"] for r in body["results"]] == list(range(21))
+    assert body["results"][3]["transaction"]["description"] == "feed 3"
+    ids = [r["transaction"]["id"] for r in body["results"]]
+    assert ids == sorted(ids)
+    assert stored(isolated_db, account_id) == (150, 21)
+
+def test_rejected_items_do_not_stop_the_batch(isolated_db, api_client, account):
+    """A withdrawal is checked against the balance left by the items before it"""
+    account_id, headers = account
+    items = [
+        item(account_id, "WITHDRAWAL", 5),       # nothing deposited yet
+        item(account_id, "DEPOSIT", 30),
+        item(account_id + 1, "DEPOSIT", 30),     # names another account
+        item(account_id, "WITHDRAWAL", 20),
+        item(account_id, "WITHDRAWAL", 20),      # only 10 left
+    ]
+    body = api_client.post(f"/api/v1/transactions/{account_id}/batch", json=items, headers=headers).json()
+    assert [r["status"] for r in body["results"]] == ["rejected", "created", "rejected", "created", "rejected"]
+    assert [r["error"] for r in body["results"]] == [
+        "Insufficient funds", None, "Account ID mismatch", None, "Insufficient funds"
+    ]
+    assert (body["created"], body["rejected"], body["balance"]) == (2, 3, 10)
+    assert stored(isolated_db, account_id) == (10, 2)
+
+def test_batch_statement_count_does_not_grow_with_size(api_client, account):
+    """
+    Ownership check and balance update are one statement each, however many
+    items; only the INSERT may be split (SQLite returns ids in order row by row)
+    """
+    account_id, headers = account
+    for size in (1, 200):
+        with capture_request_queries() as requests:
+            response = api_client.post(
+                f"/api/v1/transactions/{account_id}/batch",
+                json=[item(account_id, "DEPOSIT", 1)] * size,
+                headers=headers,
+            )
+        assert response.json()["created"] == size
+        other = [s for s in requests[0].statements if not s.startswith("INSERT INTO transactions")]
+        assert len(other) <= 4
+
+def test_batch_without_changes_keeps_etag(api_client, account):
+    """A batch whose items are all rejected leaves the account version alone"""
+    account_id, headers = account
+    etag = api_client.get(f"/api/v1/accounts/{account_id}", headers=headers).headers["ETag"]
+    body = api_client.post(
+        f"/api/v1/transactions/{account_id}/batch", json=[item(account_id, "WITHDRAWAL", 5)], headers=headers
+    ).json()
+    assert body["rejected"] == 1
+    response = api_client.get(f"/api/v1/accounts/{account_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+def test_foreign_account_is_404(isolated_db, api_client, account):
+    account_id, headers = account
+    missing = account_id + 1
+    response = api_client.post(
+        f"/api/v1/transactions/{missing}/batch", json=[item(missing, "DEPOSIT", 5)], headers=headers
+    )
+    assert response.status_code == 404
+    assert stored(isolated_db, account_id) == (0, 0)
+
+def test_batch_size_is_bounded(api_client, account):
+    account_id, headers = account
+    url = f"/api/v1/transactions/{account_id}/batch"
+    assert api_client.post(url, json=[], headers=headers).status_code == 400
+    too_many = [item(account_id, "DEPOSIT", 1)] * (TRANSACTION_BATCH_MAX_ITEMS + 1)
+    assert api_client.post(url, json=too_many, headers=headers).status_code == 400
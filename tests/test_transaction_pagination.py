@@ -0,0 +1,88 @@
+"""
+Tests for keyset pagination of GET /transactions/{account_id}
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.archive import archive_cutoff, archive_transactions
+from app.models import Transaction
+from app.query_stats import capture_request_queries
+
+@pytest.fixture
+def busy_account(api_client, api_user):
+    """An account with 7 transactions, most created within the same second"""
+    holder_id, headers = api_user
+    account_id = api_client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "CHECKING"}, headers=headers).json()["id"]
+    for amount in range(1, 6):
+        api_client.post(
+            f"/api/v1/transactions/{account_id}",
+            json={"account_id": account_id, "type": "DEPOSIT", "amount": amount},
+            headers=headers,
+        )
+    for amount in (1, 2):
+        api_client.post(
+            f"/api/v1/transactions/{account_id}",
+            json={"account_id": account_id, "type": "WITHDRAWAL", "amount": amount},
+            headers=headers,
+        )
+    return account_id, headers
+
+def all_pages(api_client, account_id, headers, **params):
+    pages, cursor = [], None
+    for _ in range(20):
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = api_client.get(f"/api/v1/transactions/{account_id}", params=query, headers=headers)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return pages
+    pytest.fail("pagination did not terminate")
+
+def test_pages_cover_every_transaction_once(api_client, busy_account):
+    """Paging by 3 returns all rows, newest first, with no repeats or gaps"""
+    account_id, headers = busy_account
+    pages = all_pages(api_client, account_id, headers, limit=3)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    rows = [t for page in pages for t in page]
+    everything = api_client.get(f"/api/v1/transactions/{account_id}", headers=headers).json()
+    assert [t["id"] for t in rows] == [t["id"] for t in everything]
+    assert len({t["id"] for t in rows}) == 7
+
+def test_type_filter(api_client, busy_account):
+    """?type= restricts every page to that type"""
+    account_id, headers = busy_account
+    pages = all_pages(api_client, account_id, headers, limit=1, type="WITHDRAWAL")
+    assert [t["amount"] for page in pages for t in page] == [2, 1]
+
+def test_page_cost_is_independent_of_depth(api_client, busy_account):
+    """A deep page runs the same bounded queries as the first"""
+    account_id, headers = busy_account
+    url = f"/api/v1/transactions/{account_id}"
+    with capture_request_queries() as requests:
+        first = api_client.get(url, params={"limit": 2}, headers=headers)
+        api_client.get(url, params={"limit": 2, "cursor": first.headers["x-next-cursor"]}, headers=headers)
+    assert requests[0].count == requests[1].count
+    assert all("LIMIT" in s for s in requests[1].statements if "FROM transactions" in s)
+
+def test_pages_continue_into_archive(isolated_db, api_client, busy_account):
+    """Once the hot rows are exhausted, paging carries on through archived rows"""
+    account_id, headers = busy_account
+    with isolated_db.begin() as conn:
+        conn.execute(
+            update(Transaction)
+            .where(Transaction.amount.in_([1, 2]), Transaction.type == "DEPOSIT")
+            .values(created_at=datetime.utcnow() - timedelta(days=400))
+        )
+    assert archive_transactions(isolated_db, archive_cutoff(365)) == 2
+    rows = [t for page in all_pages(api_client, account_id, headers, limit=2) for t in page]
+    assert len(rows) == 7
+    assert [t["amount"] for t in rows[-2:]] == [2, 1]
+
+def test_invalid_cursor_and_limit_rejected(api_client, busy_account):
+    account_id, headers = busy_account
+    url = f"/api/v1/transactions/{account_id}"
+    assert api_client.get(url, params={"cursor": "not-a-cursor"}, headers=headers).status_code == 400
+    assert api_client.get(url, params={"limit": 0}, headers=headers).status_code == 422
@@ -0,0 +1,77 @@
+"""
+Tests for the authenticated user cache
+"""
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache
+from app.models import AccountHolder
+from app.query_stats import capture_request_queries
+from app.user_cache import user_cache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_ttl_cache_expires_entries():
+    """Entries vanish once their time-to-live has passed"""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, timer=clock)
+    cache.set("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+
+def test_ttl_cache_evicts_least_recently_used():
+    """The least recently used entry is evicted when full"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+def test_ttl_cache_disabled_when_empty():
+    """maxsize 0 stores nothing"""
+    cache = TTLCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+def test_authenticated_requests_skip_user_query(api_client, api_user):
+    """Once cached, authenticating a request costs no query"""
+    holder_id, headers = api_user
+    with capture_request_queries() as requests:
+        profile = api_client.get("/api/v1/account-holders/me", headers=headers).json()
+        response = api_client.post("/api/v1/accounts/", json={"holder_id": holder_id, "type": "SAVINGS"}, headers=headers)
+    assert profile["id"] == holder_id
+    assert response.status_code == 201
+    assert requests[0].count == 0
+    assert not any("FROM account_holders" in s for s in requests[1].statements)
+
+def test_deactivation_invalidates_cache(isolated_db, api_client, api_user):
+    """Deactivating a holder takes effect on the next request"""
+    holder_id, headers = api_user
+    assert api_client.get("/api/v1/account-holders/me", headers=headers).status_code == 200
+    assert len(user_cache) == 1
+
+    with Session(isolated_db) as db:
+        db.get(AccountHolder, holder_id).active = False
+        db.commit()
+
+    assert len(user_cache) == 0
+    response = api_client.get("/api/v1/account-holders/me", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+def test_cache_stats_endpoint(api_client, api_user, internal_headers):
+    """Operators can read the cache counters"""
+    _, headers = api_user
+    api_client.get("/api/v1/account-holders/me", headers=headers)
+    stats = api_client.get("/internal/cache", headers=internal_headers).json()["users"]
+    assert stats["size"] == 1
+    assert stats["hits"] >= 1